@@ -1,4 +1,6 @@
 # app.py
+import argparse
+import multiprocessing
 import threading
 import time
 import os
@@ -9,10 +11,21 @@ from frontend import run_frontend
 import atexit
 import signal
 
-def start_backend():
+def start_backend(production=False, threads=None):
+    """
+    Start the backend in a background thread: Flask's development server,
+    or waitress (see serve.py) when production is True.
+    """
     global backend_thread  # Make it global so we can access it for cleanup
     
-    backend_thread = threading.Thread(target=run_backend)
+    if production:
+        import serve
+        kwargs = {"threads": threads} if threads else {}
+        backend_thread = threading.Thread(target=serve.serve, kwargs=kwargs)
+        # Let requests in progress finish when the app exits
+        atexit.register(serve.shutdown)
+    else:
+        backend_thread = threading.Thread(target=run_backend)
     backend_thread.daemon = True
     backend_thread.start()
     
@@ -40,8 +53,18 @@ def start_backend():
     return False
 
 if __name__ == "__main__":
+    # Password hashing runs in spawned worker processes; needed in the PyInstaller build
+    multiprocessing.freeze_support()
+    
+    parser = argparse.ArgumentParser(description="Sudoku desktop application")
+    parser.add_argument("--production", action="store_true",
+                        help="serve the backend with waitress instead of the Flask development server")
+    parser.add_argument("--threads", type=int, default=None,
+                        help="backend worker threads in production mode")
+    args = parser.parse_args()
+    
     print("Starting Sudoku application...")
-    if start_backend():
+    if start_backend(args.production, args.threads):
         print("Starting frontend...")
         run_frontend()
     else:
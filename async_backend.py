@@ -0,0 +1,497 @@
+# async_backend.py
+"""
+Asynchronous serving mode: the backend's game API on aiohttp and asyncio.
+
+    python async_backend.py --host 127.0.0.1 --port 5000
+
+One event loop serves every connection, so an idle keep-alive client costs
+a socket instead of a thread. Queries go through SQLAlchemy's asyncio
+engine (aiosqlite for the SQLite file, see db_config.py). Password
+hashing is handed to the auth worker pool, and the puzzle bank generates
+puzzles, for refills and when it runs dry, in GENERATE_WORKERS processes,
+so neither blocks the loop or holds the GIL it runs under.
+
+The routes answer exactly like their backend.py counterparts:
+
+    /  /register  /login  /save_game  /save_game/delta
+    /load_game/<user_id>  /games/<user_id>/meta  /delete_game/<user_id>
+    /leaderboard  /puzzles/next
+
+The NDJSON bulk endpoints are only served by backend.py. Like serve.py,
+this keeps the leaderboard and caches in process memory, so run a single
+process per database, and not alongside another backend.
+"""
+import argparse
+import asyncio
+import os
+from email.utils import formatdate
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import create_async_engine
+import auth
+import db_config
+from backend import (BOARD_FORMATS, app as flask_app, basedir, compact_board, format_board,
+                     game_scope, parse_patches, played_update, prepare_database, response_cache)
+from database import User, Game, Puzzle
+from leaderboard import leaderboard, ranking_select
+from puzzle_bank import CLAIM_ATTEMPTS, DIFFICULTIES, claim, next_unserved, puzzle_bank
+from sessions import issue_token, token_user_id, user_cache
+from sudoku_logic import to_compact
+
+try:
+    from aiohttp import web
+except ImportError:  # aiohttp is only needed for this serving mode
+    web = None
+
+SHUTDOWN_TIMEOUT = 10
+# Processes generating puzzles for the puzzle bank
+GENERATE_WORKERS = 2
+
+users = User.__table__
+games = Game.__table__
+
+_engine = None
+
+class _Conflict(Exception):
+    """A save lost a race with another one; rolls back its transaction."""
+
+def _message(text, status, **fields):
+    return web.json_response({"message": text, **fields}, status=status)
+
+async def _body(request):
+    """The request's JSON object, or None if it has none."""
+    try:
+        data = await request.json()
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) else None
+
+def check_user(request, user_id):
+    """backend.check_user() for an aiohttp request."""
+    header = request.headers.get('Authorization', '')
+    if header.startswith('Bearer '):
+        token_id = token_user_id(header[7:], flask_app.secret_key)
+        if token_id is None:
+            return _message("Invalid or expired session, please log in again", 401)
+        if str(token_id) != str(user_id):
+            return _message("Session does not belong to this user", 403)
+        return None
+    if flask_app.config['ALLOW_UNAUTHENTICATED']:
+        return None
+    return _message("Missing session token", 401)
+
+def busy_response():
+    """503 for requests shed while the password hashers are saturated."""
+    return web.json_response({"message": "Server is busy, please try again shortly"},
+                             status=503, headers={"Retry-After": "1"})
+
+async def _cached(request, scope, view):
+    """
+    Serve a GET from response_cache like backend.cached_response(): view()
+    builds the response on a miss, and 200 responses carry an ETag and
+    answer If-None-Match with 304.
+    """
+    path = request.path_qs
+    entry = response_cache.get(scope, path)
+    if entry is None:
+        generation = response_cache.generation(scope)
+        response = await view()
+        if response.status not in (200, 404):
+            return response
+        entry = response_cache.put(scope, path, response.body, response.status, generation)
+    body, status, etag, last_modified = entry
+
+    headers = {}
+    if etag is not None:
+        headers = {"ETag": etag,
+                   "Last-Modified": formatdate(last_modified, usegmt=True),
+                   "Cache-Control": "no-cache"}  # Always revalidate
+        if any(tag.value in (etag.strip('"'), '*') for tag in request.if_none_match or ()):
+            return web.Response(status=304, headers=headers)
+    return web.Response(body=body, status=status, content_type="application/json", headers=headers)
+
+async def _stats_row(conn, user_id):
+    """The user's leaderboard columns (id, username and statistics), or None."""
+    return (await conn.execute(ranking_select().order_by(None).where(users.c.id == user_id))).first()
+
+async def _get_user(user_id):
+    """user_cache.get() without blocking the loop on a miss."""
+    cached = user_cache.cached(user_id)
+    if cached is not None:
+        return cached
+    async with _engine.connect() as conn:
+        row = await _stats_row(conn, user_id)
+    return user_cache.put(row) if row is not None else None
+
+def _stats_changed(row):
+    user_cache.put(row)
+    leaderboard.update(row)
+    response_cache.invalidate("leaderboard")
+
+# --- Routes ---
+
+async def health_check(request):
+    return web.json_response({"status": "ok"})
+
+async def register(request):
+    data = await _body(request)
+    if not data or 'username' not in data or 'password' not in data:
+        return _message("Missing username or password", 400)
+    async with _engine.connect() as conn:
+        taken = (await conn.execute(select(users.c.id).where(users.c.username == data['username']))).first()
+    if taken:
+        return _message("Username already exists", 400)
+    try:
+        # Waits on the auth worker pool from a thread, not the loop
+        hashed_password = await asyncio.to_thread(auth.hash_password, data['password'])
+    except auth.AuthBusy:
+        return busy_response()
+    try:
+        async with _engine.begin() as conn:
+            result = await conn.execute(insert(users).values(username=data['username'], password=hashed_password))
+            row = await _stats_row(conn, result.inserted_primary_key[0])
+    except IntegrityError:
+        return _message("Username already exists", 400)
+    _stats_changed(row)
+    return _message("User registered successfully", 200)
+
+async def login(request):
+    data = await _body(request)
+    if not data or 'username' not in data or 'password' not in data:
+        return _message("Missing username or password", 400)
+    async with _engine.connect() as conn:
+        user = (await conn.execute(select(users).where(users.c.username == data['username']))).first()
+    try:
+        ok, new_hash = await asyncio.to_thread(auth.verify_password, user.password, data['password']) \
+            if user else (False, None)
+    except auth.AuthBusy:
+        return busy_response()
+    if not ok:
+        return _message("Invalid credentials", 401)
+    if new_hash:
+        # Upgrade the stored hash to the current iteration count
+        async with _engine.begin() as conn:
+            await conn.execute(update(users).where(users.c.id == user.id).values(password=new_hash))
+    user_cache.put(user)
+    return web.json_response({
+        "message": "Login successful",
+        "user_id": user.id,
+        "token": issue_token(user.id, flask_app.secret_key),
+        "stats": {
+            "puzzles_played": user.puzzles_played,
+            "puzzles_solved": user.puzzles_solved,
+            "win_percentage": user.win_percentage
+        }
+    })
+
+async def save_game(request):
+    data = await _body(request)
+    if not data or 'user_id' not in data or 'board_state' not in data:
+        return _message("Missing data", 400)
+    user_id = data['user_id']
+    error = check_user(request, user_id)
+    if error is not None:
+        return error
+    if await _get_user(user_id) is None:
+        return _message("Unknown user", 404)
+
+    try:
+        board_state = compact_board(data['board_state'])
+        original_board = compact_board(data.get('original_board', data['board_state']))
+        solution = compact_board(data['solution']) if data.get('solution') else None
+    except (ValueError, TypeError):
+        return _message("Invalid board state format", 400)
+
+    completed = data.get('completed', False)
+    stats = None
+    try:
+        async with _engine.begin() as conn:
+            game = (await conn.execute(
+                select(games.c.id, games.c.hints_used, games.c.solved_by_algorithm,
+                       games.c.solution, games.c.version)
+                .where(games.c.user_id == user_id, games.c.completed == False)
+            )).first()
+            if game and data.get('version') is not None and data['version'] != game.version:
+                return _message("Saved game has changed", 409, version=game.version)
+            if game:
+                hints_used = data.get('hints_used', game.hints_used)
+                solved_by_algorithm = data.get('solved_by_algorithm', game.solved_by_algorithm)
+                version = game.version + 1
+                values = {"board_state": board_state, "completed": completed, "hints_used": hints_used,
+                          "solved_by_algorithm": solved_by_algorithm, "version": version}
+                if solution and not game.solution:
+                    values["solution"] = solution
+                # Same version check as the ORM's version_id_col in backend.py
+                result = await conn.execute(update(games).where(
+                    games.c.id == game.id, games.c.version == game.version).values(**values))
+                if not result.rowcount:
+                    raise _Conflict()
+                if completed:
+                    # Count as solved only if user didn't use too many hints or the solve button
+                    solved = hints_used <= 2 and not solved_by_algorithm
+                    await conn.execute(played_update(user_id, solved))
+                    stats = await _stats_row(conn, user_id)
+            else:
+                version = 1
+                await conn.execute(insert(games).values(
+                    user_id=user_id,
+                    board_state=board_state,
+                    original_board=original_board,
+                    solution=solution,
+                    completed=completed,
+                    hints_used=data.get('hints_used', 0),
+                    solved_by_algorithm=data.get('solved_by_algorithm', False),
+                    version=version
+                ))
+                if data.get('is_new_game', False):
+                    # Count the game as played unless the user has finished one before
+                    previous_completed_game = (await conn.execute(select(games.c.id).where(
+                        games.c.user_id == user_id, games.c.completed == True).limit(1))).first()
+                    if not previous_completed_game:
+                        await conn.execute(played_update(user_id, False))
+                        stats = await _stats_row(conn, user_id)
+    except (IntegrityError, _Conflict):
+        # Another request created or updated this user's active game first
+        return _message("Game was modified concurrently, please retry", 409)
+    except Exception as e:
+        return _message(f"Error saving game: {str(e)}", 500)
+
+    response_cache.invalidate(game_scope(user_id))
+    if stats is not None:
+        _stats_changed(stats)
+    return _message("Game saved successfully", 200, version=version)
+
+async def save_game_delta(request):
+    """backend.save_game_delta(): apply changed cells if the game is still at the given version."""
+    data = await _body(request)
+    if not data or 'user_id' not in data or 'version' not in data or 'patches' not in data:
+        return _message("Missing data", 400)
+    try:
+        patches = parse_patches(data['patches'])
+    except ValueError as e:
+        return _message(f"Invalid patches: {e}", 400)
+    user_id = data['user_id']
+    error = check_user(request, user_id)
+    if error is not None:
+        return error
+    version = data['version']
+
+    try:
+        async with _engine.begin() as conn:
+            game = (await conn.execute(
+                select(games.c.id, games.c.board_state, games.c.original_board, games.c.version)
+                .where(games.c.user_id == user_id, games.c.completed == False)
+            )).first()
+            if not game:
+                return _message("No saved game found", 404)
+            if game.version != version:
+                return _message("Saved game has changed", 409, version=game.version)
+
+            cells = bytearray(to_compact(game.board_state), 'ascii')
+            original = to_compact(game.original_board)
+            for index, value in patches:
+                if original[index] != '0':
+                    return _message("Cannot change a given cell", 400)
+                cells[index] = ord('0') + value
+
+            values = {"board_state": cells.decode('ascii'), "version": version + 1}
+            for key in ('hints_used', 'solved_by_algorithm'):
+                if key in data:
+                    values[key] = data[key]
+            result = await conn.execute(update(games).where(
+                games.c.id == game.id, games.c.version == version).values(**values))
+            if not result.rowcount:
+                raise _Conflict()
+    except _Conflict:
+        return _message("Saved game has changed", 409)
+    except Exception as e:
+        return _message(f"Error saving game: {str(e)}", 500)
+    response_cache.invalidate(game_scope(user_id))
+    return _message("Game saved successfully", 200, version=version + 1)
+
+async def load_game(request):
+    user_id = int(request.match_info['user_id'])
+    error = check_user(request, user_id)
+    if error is not None:
+        return error
+
+    async def view():
+        fmt = request.query.get('format', 'compact')
+        if fmt not in BOARD_FORMATS:
+            return _message("Unknown board format", 400)
+        try:
+            async with _engine.connect() as conn:
+                game = (await conn.execute(select(games).where(
+                    games.c.user_id == user_id, games.c.completed == False))).first()
+        except Exception as e:
+            return _message(f"Error loading game: {str(e)}", 500)
+        if not game:
+            return _message("No saved game found", 404)
+        return web.json_response({
+            "board_state": format_board(game.board_state, fmt),
+            "original_board": format_board(game.original_board, fmt),
+            "solution": format_board(game.solution, fmt) if game.solution else None,
+            "hints_used": game.hints_used,
+            "solved_by_algorithm": game.solved_by_algorithm,
+            "version": game.version
+        })
+    return await _cached(request, game_scope(user_id), view)
+
+async def game_meta(request):
+    """backend.game_meta(): whether the user has an unfinished game, without its boards."""
+    user_id = int(request.match_info['user_id'])
+    error = check_user(request, user_id)
+    if error is not None:
+        return error
+
+    async def view():
+        try:
+            async with _engine.connect() as conn:
+                game = (await conn.execute(
+                    select(games.c.id, games.c.created_at, games.c.updated_at, games.c.hints_used)
+                    .where(games.c.user_id == user_id, games.c.completed == False)
+                )).first()
+        except Exception as e:
+            return _message(f"Error loading game: {str(e)}", 500)
+        if not game:
+            return _message("No saved game found", 404)
+        return web.json_response({
+            "game_id": game.id,
+            "created_at": game.created_at.isoformat() if game.created_at else None,
+            "updated_at": game.updated_at.isoformat() if game.updated_at else None,
+            "hints_used": game.hints_used
+        })
+    return await _cached(request, game_scope(user_id), view)
+
+async def delete_game(request):
+    user_id = int(request.match_info['user_id'])
+    error = check_user(request, user_id)
+    if error is not None:
+        return error
+    try:
+        async with _engine.begin() as conn:
+            result = await conn.execute(delete(games).where(
+                games.c.user_id == user_id, games.c.completed == False))
+    except Exception as e:
+        return _message(f"Error deleting game: {str(e)}", 500)
+    if not result.rowcount:
+        return _message("No game to delete", 404)
+    response_cache.invalidate(game_scope(user_id))
+    return _message("Game deleted", 200)
+
+async def get_leaderboard(request):
+    """backend.get_leaderboard(): one page of the ranking, with limit, offset or cursor, and user_id."""
+    async def view():
+        try:
+            limit = min(max(int(request.query.get('limit', 50)), 1), 500)
+            offset = max(int(request.query.get('offset', 0)), 0)
+            try:
+                user_id = int(request.query['user_id'])
+            except (KeyError, ValueError):
+                user_id = None
+            if not leaderboard.loaded:
+                async with _engine.connect() as conn:
+                    leaderboard.load((await conn.execute(ranking_select())).all())
+            rows, next_cursor, total = leaderboard.page(limit, offset, request.query.get('cursor'))
+        except ValueError:
+            return _message("Invalid leaderboard parameters", 400)
+        except Exception as e:
+            return _message(f"Error fetching leaderboard: {str(e)}", 500)
+
+        response = {"leaderboard": rows, "next_cursor": next_cursor, "total": total}
+        if user_id is not None:
+            response["me"] = leaderboard.rank(user_id)
+        return web.json_response(response)
+    return await _cached(request, "leaderboard", view)
+
+async def next_puzzle(request):
+    """backend.next_puzzle(): claim a puzzle from the shared bank."""
+    difficulty = request.query.get('difficulty', 'medium')
+    if difficulty not in DIFFICULTIES:
+        return _message("Unknown difficulty", 400)
+    try:
+        puzzle = None
+        for _ in range(CLAIM_ATTEMPTS):
+            async with _engine.begin() as conn:
+                row = (await conn.execute(next_unserved(difficulty))).first()
+                claimed = row is not None and (await conn.execute(claim(row.id))).rowcount
+            if row is None:
+                break
+            if claimed:
+                puzzle_bank.served(difficulty)
+                puzzle = tuple(row)
+                break
+        if puzzle is None:
+            # The bank ran dry: generate one in the bank's processes and hand it out as served
+            new = await asyncio.wrap_future(puzzle_bank.generate(difficulty, served=True))
+            async with _engine.begin() as conn:
+                result = await conn.execute(insert(Puzzle.__table__).values(**new))
+            puzzle_bank.served(difficulty, from_bank=False)
+            puzzle = (result.inserted_primary_key[0], new["givens"], new["solution"])
+    except Exception as e:
+        return _message(f"Error fetching puzzle: {str(e)}", 500)
+    puzzle_id, givens, solution = puzzle
+    return web.json_response({
+        "id": puzzle_id,
+        "difficulty": difficulty,
+        "givens": givens,
+        "solution": solution
+    }, headers={"Cache-Control": "no-store"})
+
+# --- Application ---
+
+async def _stop_puzzle_bank(app):
+    await asyncio.to_thread(puzzle_bank.stop, 1.0)
+
+async def _open_engine(app):
+    global _engine
+    url = db_config.async_database_url(os.path.join(basedir, "sudoku.db"))
+    _engine = create_async_engine(url, **db_config.async_engine_options(url))
+
+async def _close_engine(app):
+    global _engine
+    if _engine is not None:
+        await _engine.dispose()
+        _engine = None
+
+def make_app():
+    """The aiohttp application; the database engine is opened on startup."""
+    if web is None:
+        raise RuntimeError("aiohttp is not installed (pip install aiohttp aiosqlite)")
+    app = web.Application()
+    app.router.add_get('/', health_check)
+    app.router.add_post('/register', register)
+    app.router.add_post('/login', login)
+    app.router.add_post('/save_game', save_game)
+    app.router.add_post('/save_game/delta', save_game_delta)
+    app.router.add_get(r'/load_game/{user_id:\d+}', load_game)
+    app.router.add_get(r'/games/{user_id:\d+}/meta', game_meta)  # Also answers HEAD
+    app.router.add_delete(r'/delete_game/{user_id:\d+}', delete_game)
+    app.router.add_get('/leaderboard', get_leaderboard)
+    app.router.add_get('/puzzles/next', next_puzzle)
+    app.on_startup.append(_open_engine)
+    app.on_cleanup.append(_stop_puzzle_bank)
+    app.on_cleanup.append(_close_engine)
+    return app
+
+def serve(host='127.0.0.1', port=5000, shutdown_timeout=SHUTDOWN_TIMEOUT):
+    """
+    Serve the backend until SIGINT or SIGTERM, then give requests in
+    progress shutdown_timeout seconds to finish.
+    """
+    app = make_app()
+    prepare_database(puzzle_workers=GENERATE_WORKERS)
+    web.run_app(app, host=host, port=port, shutdown_timeout=shutdown_timeout,
+                print=lambda message: print(f"Serving on http://{host}:{port} (asyncio)"))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the Sudoku backend on asyncio")
+    parser.add_argument("--host", default=os.environ.get("SUDOKU_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("SUDOKU_PORT", 5000)))
+    parser.add_argument("--shutdown-timeout", type=float, default=SHUTDOWN_TIMEOUT,
+                        help="seconds to let requests in progress finish on shutdown")
+    args = parser.parse_args(argv)
+    serve(args.host, args.port, args.shutdown_timeout)
+
+if __name__ == "__main__":
+    main()
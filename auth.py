@@ -0,0 +1,119 @@
+# auth.py
+"""
+Password hashing off the request threads.
+
+pbkdf2 hashes are computed in a small pool of worker processes, so a burst
+of logins cannot starve the threads serving other requests. At most
+MAX_PENDING hashes may be queued or running; beyond that hash_password()
+and verify_password() raise AuthBusy at once, and the backend answers 503
+instead of letting requests pile up. They also raise AuthBusy if a hash
+takes longer than HASH_TIMEOUT, or if a worker process died (the pool is
+then rebuilt for the next call).
+
+    SUDOKU_PBKDF2_ITERATIONS  pbkdf2-sha256 rounds for new hashes (default 260000)
+    SUDOKU_HASH_WORKERS       worker processes (default: CPU count; 0 hashes inline)
+    SUDOKU_HASH_MAX_PENDING   hashes queued or running before shedding load
+                              (default: 8 per worker)
+
+Stored hashes made with other parameters still verify, and are replaced by
+a hash with the current parameters on the next successful login.
+"""
+import atexit
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from werkzeug.security import generate_password_hash, check_password_hash
+from db_config import env_int
+
+PBKDF2_ITERATIONS = env_int('SUDOKU_PBKDF2_ITERATIONS', 260000)
+HASH_METHOD = f'pbkdf2:sha256:{PBKDF2_ITERATIONS}'
+HASH_WORKERS = env_int('SUDOKU_HASH_WORKERS', os.cpu_count() or 1)
+MAX_PENDING = env_int('SUDOKU_HASH_MAX_PENDING', 8 * max(HASH_WORKERS, 1))
+# Seconds to wait for a queued hash before giving up
+HASH_TIMEOUT = 30
+
+class AuthBusy(Exception):
+    """No password hash could be computed right now; the caller should retry later."""
+
+_executor = None
+_executor_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(MAX_PENDING)
+
+def _hash(password, method):
+    return generate_password_hash(password, method=method)
+
+def _verify(stored_hash, password, method):
+    """Worker: check a password and, if it matches an outdated hash, hash it again."""
+    if not check_password_hash(stored_hash, password):
+        return False, None
+    if stored_hash.split('$', 1)[0] != method:
+        return True, generate_password_hash(password, method=method)
+    return True, None
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # spawn, not fork: the backend is multi-threaded when the pool starts
+            _executor = ProcessPoolExecutor(max_workers=HASH_WORKERS,
+                                            mp_context=multiprocessing.get_context('spawn'))
+        return _executor
+
+def _discard_executor(executor):
+    """Drop a broken pool, so _get_executor() starts a new one."""
+    global _executor
+    with _executor_lock:
+        if _executor is executor:
+            _executor = None
+    executor.shutdown(wait=False, cancel_futures=True)
+
+def _run(fn, *args):
+    if not _slots.acquire(blocking=False):
+        raise AuthBusy("Too many logins in progress")
+    if HASH_WORKERS <= 0:
+        try:
+            return fn(*args)
+        finally:
+            _slots.release()
+    
+    executor = _get_executor()
+    try:
+        future = executor.submit(fn, *args)
+    except BrokenProcessPool:
+        _slots.release()
+        _discard_executor(executor)
+        raise AuthBusy("Password hashing workers are restarting")
+    # The slot is freed when the hash is finished or cancelled, not when the caller stops waiting
+    future.add_done_callback(lambda f: _slots.release())
+    try:
+        return future.result(timeout=HASH_TIMEOUT)
+    except FutureTimeoutError:
+        future.cancel()  # Only succeeds if it has not started yet
+        raise AuthBusy("Timed out waiting for a password hash")
+    except BrokenProcessPool:
+        _discard_executor(executor)
+        raise AuthBusy("Password hashing workers are restarting")
+
+def hash_password(password):
+    """Hash a new password with the current parameters. Raises AuthBusy."""
+    return _run(_hash, password, HASH_METHOD)
+
+def verify_password(stored_hash, password):
+    """
+    Check a password against its stored hash. Returns (ok, new_hash):
+    new_hash is a replacement made with the current parameters when the
+    password is right but the stored hash is outdated, else None.
+    Raises AuthBusy.
+    """
+    return _run(_verify, stored_hash, password, HASH_METHOD)
+
+@atexit.register
+def shutdown():
+    """Stop the worker processes."""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
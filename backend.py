@@ -1,11 +1,30 @@
 # backend.py
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, make_response, stream_with_context
 from flask_sqlalchemy import SQLAlchemy
-from werkzeug.security import generate_password_hash, check_password_hash
+from werkzeug.serving import WSGIRequestHandler
+from sqlalchemy import bindparam
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.exc import StaleDataError
 from database import db, User, Game
+import db_config
+from migrations import upgrade
+from leaderboard import leaderboard
+from puzzle_bank import DIFFICULTIES, puzzle_bank
+import auth
+from sessions import issue_token, token_user_id, user_cache
+from sudoku_logic import (PACKED_TEXT_LENGTH, board_to_compact, board_to_packed, board_to_string,
+                          packed_to_board, string_to_board, to_compact)
+from collections import OrderedDict
+from datetime import datetime
+from email.utils import formatdate
+from functools import wraps
+import hashlib
 import json
 import os
+import secrets
 import sys
+import threading
+import time
 
 app = Flask(__name__)
 
@@ -17,15 +36,199 @@ else:
     # If the application is run from script
     basedir = os.path.abspath(os.path.dirname(__file__))
 
-app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{os.path.join(basedir, "sudoku.db")}'
+# sudoku.db next to the app unless SUDOKU_DATABASE_URL says otherwise (see db_config.py)
+db_config.configure(app, os.path.join(basedir, "sudoku.db"))
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+# Signs session tokens. Set SUDOKU_SECRET_KEY to keep tokens valid across restarts
+app.secret_key = os.environ.get('SUDOKU_SECRET_KEY') or secrets.token_hex(32)
+# Bearer credential for the /games/bulk admin routes; they are disabled while it is unset
+app.config['ADMIN_TOKEN'] = os.environ.get('SUDOKU_ADMIN_TOKEN') or None
+# Trust the user_id of requests without a session token (pre-token clients only).
+# Off unless SUDOKU_ALLOW_UNAUTHENTICATED=1
+app.config['ALLOW_UNAUTHENTICATED'] = os.environ.get('SUDOKU_ALLOW_UNAUTHENTICATED', '') not in ('', '0')
 db.init_app(app)
 
+# Board formats a response can be rendered in (?format=)
+BOARD_FORMATS = ('compact', 'json', 'packed')
+
+def compact_board(value):
+    """
+    Normalize a board sent by a client to the compact storage string.
+    Accepts the compact string, base64 packed text, a legacy JSON string or
+    a nested list. Raises ValueError or TypeError if the board is malformed.
+    """
+    if isinstance(value, list):
+        if len(value) != 9 or any(not isinstance(row, list) or len(row) != 9 for row in value):
+            raise ValueError("Board must be 9x9")
+        return to_compact(board_to_string(value))
+    if isinstance(value, str) and len(value) == PACKED_TEXT_LENGTH:
+        return board_to_compact(packed_to_board(value))
+    return to_compact(value)
+
+def format_board(board_state, fmt):
+    """Render a stored board for a response in the requested format (see BOARD_FORMATS)."""
+    if fmt == 'json':
+        return json.dumps(string_to_board(board_state))
+    if fmt == 'packed':
+        return board_to_packed(string_to_board(board_state))
+    return to_compact(board_state)
+
+class ResponseCache:
+    """
+    Cache of GET response bodies, grouped into scopes ("leaderboard",
+    "game:<user_id>") that writers invalidate.
+
+    Each 200 entry carries an ETag (hash of the body), so clients can
+    revalidate with If-None-Match and get an empty 304 when nothing changed.
+    Its Last-Modified time is informational only: it has whole-second
+    precision, so a write in the same second would not show in it. Entries are evicted least recently used
+    first beyond max_entries.
+    """
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # (scope, path) -> (body, status, etag, last_modified)
+        self._modified = {}            # scope -> time of the last invalidation
+        self._generations = {}         # scope -> number of invalidations
+        self._lock = threading.Lock()
+
+    def get(self, scope, path):
+        with self._lock:
+            entry = self._entries.get((scope, path))
+            if entry is not None:
+                self._entries.move_to_end((scope, path))
+            return entry
+
+    def generation(self, scope):
+        """Changes on every invalidation of the scope; pass it to put()."""
+        with self._lock:
+            return self._generations.get(scope, 0)
+
+    def put(self, scope, path, body, status, generation=None):
+        """
+        Store a response and return its entry. If the scope was invalidated
+        since generation was read, the response may be stale: the entry is
+        returned but not stored.
+        """
+        etag = '"' + hashlib.sha1(body).hexdigest() + '"' if status == 200 else None
+        with self._lock:
+            last_modified = self._modified.setdefault(scope, time.time())
+            entry = (body, status, etag, last_modified)
+            if generation is not None and generation != self._generations.get(scope, 0):
+                return entry
+            self._entries[(scope, path)] = entry
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return entry
+
+    def invalidate(self, scope):
+        with self._lock:
+            self._modified[scope] = time.time()
+            self._generations[scope] = self._generations.get(scope, 0) + 1
+            for key in [key for key in self._entries if key[0] == scope]:
+                del self._entries[key]
+
+response_cache = ResponseCache()
+
+def game_scope(user_id):
+    return f"game:{user_id}"
+
+def cached_response(scope_for):
+    """
+    Serve a GET route from response_cache. scope_for receives the route's
+    keyword arguments and returns the cache scope. Only 200 and 404
+    responses are cached; 200 responses answer If-None-Match with 304.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(**kwargs):
+            scope = scope_for(**kwargs)
+            path = request.full_path
+            entry = response_cache.get(scope, path)
+            if entry is None:
+                # Read before the view runs, so a write that lands meanwhile keeps its result out of the cache
+                generation = response_cache.generation(scope)
+                response = make_response(view(**kwargs))
+                if response.status_code not in (200, 404):
+                    return response
+                entry = response_cache.put(scope, path, response.get_data(), response.status_code, generation)
+            body, status, etag, last_modified = entry
+            
+            if etag is not None:
+                # If-Modified-Since is not honoured; see ResponseCache
+                if request.if_none_match.contains_weak(etag.strip('"')):
+                    response = make_response("", 304)
+                else:
+                    response = make_response(body, status)
+                    response.content_type = "application/json"
+                response.headers["ETag"] = etag
+                response.headers["Last-Modified"] = formatdate(last_modified, usegmt=True)
+                response.headers["Cache-Control"] = "no-cache"  # Always revalidate
+                return response
+            response = make_response(body, status)
+            response.content_type = "application/json"
+            return response
+        return wrapper
+    return decorator
+
 @app.route('/', methods=['GET'])
 def health_check():
     """Simple health check endpoint"""
     return jsonify({"status": "ok"}), 200
 
+def check_user(user_id):
+    """
+    Authenticate a request acting for user_id, without touching the
+    database. With an "Authorization: Bearer <token>" header from /login the
+    token must be valid and name this user. Requests without one are
+    rejected unless ALLOW_UNAUTHENTICATED is set for older clients.
+    Returns None if allowed, else an error response.
+    """
+    header = request.headers.get('Authorization', '')
+    if header.startswith('Bearer '):
+        token_id = token_user_id(header[7:])
+        if token_id is None:
+            return jsonify({"message": "Invalid or expired session, please log in again"}), 401
+        if str(token_id) != str(user_id):
+            return jsonify({"message": "Session does not belong to this user"}), 403
+        return None
+    if app.config['ALLOW_UNAUTHENTICATED']:
+        return None
+    return jsonify({"message": "Missing session token"}), 401
+
+def user_route(view):
+    """Apply check_user() to the route's user_id before anything else, including the response cache."""
+    @wraps(view)
+    def wrapper(**kwargs):
+        error = check_user(kwargs['user_id'])
+        if error is not None:
+            return error
+        return view(**kwargs)
+    return wrapper
+
+def admin_route(view):
+    """
+    Allow the route only with "Authorization: Bearer <SUDOKU_ADMIN_TOKEN>":
+    401 without a credential, 403 with a wrong one or if no admin token is
+    configured.
+    """
+    @wraps(view)
+    def wrapper(**kwargs):
+        admin_token = app.config['ADMIN_TOKEN']
+        if not admin_token:
+            return jsonify({"message": "Admin routes are disabled"}), 403
+        header = request.headers.get('Authorization', '')
+        if not header.startswith('Bearer '):
+            return jsonify({"message": "Missing admin token"}), 401
+        if not secrets.compare_digest(header[7:].encode(), admin_token.encode()):
+            return jsonify({"message": "Invalid admin token"}), 403
+        return view(**kwargs)
+    return wrapper
+
+def busy_response():
+    """503 for requests shed while the password hashers are saturated."""
+    return jsonify({"message": "Server is busy, please try again shortly"}), 503, {"Retry-After": "1"}
+
 @app.route('/register', methods=['POST'])
 def register():
     data = request.get_json()
@@ -33,11 +236,17 @@ def register():
         return jsonify({"message": "Missing username or password"}), 400
     if User.query.filter_by(username=data['username']).first():
         return jsonify({"message": "Username already exists"}), 400
-    # Use pbkdf2 with sha256 for better security
-    hashed_password = generate_password_hash(data['password'], method='pbkdf2:sha256')
+    # pbkdf2-sha256, computed in the auth worker pool
+    try:
+        hashed_password = auth.hash_password(data['password'])
+    except auth.AuthBusy:
+        return busy_response()
     new_user = User(username=data['username'], password=hashed_password)
     db.session.add(new_user)
     db.session.commit()
+    user_cache.put(new_user)
+    leaderboard.update(new_user)
+    response_cache.invalidate("leaderboard")
     return jsonify({"message": "User registered successfully"}), 200
 
 @app.route('/login', methods=['POST'])
@@ -46,10 +255,20 @@ def login():
     if not data or 'username' not in data or 'password' not in data:
         return jsonify({"message": "Missing username or password"}), 400
     user = User.query.filter_by(username=data['username']).first()
-    if user and check_password_hash(user.password, data['password']):
+    try:
+        ok, new_hash = auth.verify_password(user.password, data['password']) if user else (False, None)
+    except auth.AuthBusy:
+        return busy_response()
+    if ok:
+        if new_hash:
+            # Upgrade the stored hash to the current iteration count
+            user.password = new_hash
+            db.session.commit()
+        user_cache.put(user)
         return jsonify({
             "message": "Login successful", 
             "user_id": user.id,
+            "token": issue_token(user.id),
             "stats": {
                 "puzzles_played": user.puzzles_played,
                 "puzzles_solved": user.puzzles_solved,
@@ -58,18 +277,56 @@ def login():
         }), 200
     return jsonify({"message": "Invalid credentials"}), 401
 
+def played_update(user_id, solved):
+    """
+    UPDATE counting a played (and, if solved, won) puzzle for a user. The
+    counters and win percentage are computed from the stored values in one
+    statement, so concurrent saves cannot lose increments.
+    """
+    users = User.__table__
+    solved = int(bool(solved))
+    return db.update(users).where(users.c.id == user_id).values(
+        puzzles_played=users.c.puzzles_played + 1,
+        puzzles_solved=users.c.puzzles_solved + solved,
+        # Right-hand sides see the old values, hence the + 1 / + solved again
+        win_percentage=(users.c.puzzles_solved + solved) * 100.0 / (users.c.puzzles_played + 1)
+    )
+
+def record_played(user_id, solved):
+    """Apply played_update() in the current transaction. Returns the updated stats row; commit afterwards."""
+    db.session.execute(played_update(user_id, solved))
+    return User.query.with_entities(
+        User.id, User.username, User.puzzles_played, User.puzzles_solved, User.win_percentage
+    ).filter(User.id == user_id).one()
+
 @app.route('/save_game', methods=['POST'])
 def save_game():
     data = request.get_json()
     if not data or 'user_id' not in data or 'board_state' not in data:
         return jsonify({"message": "Missing data"}), 400
+    error = check_user(data['user_id'])
+    if error is not None:
+        return error
+    if user_cache.get(data['user_id']) is None:
+        return jsonify({"message": "Unknown user"}), 404
+    
+    try:
+        # Normalize both boards to the compact format; JSON is accepted from older clients
+        board_state = compact_board(data['board_state'])
+        original_board = compact_board(data.get('original_board', data['board_state']))
+        solution = compact_board(data['solution']) if data.get('solution') else None
+    except (ValueError, TypeError):
+        return jsonify({"message": "Invalid board state format"}), 400
     
     try:
-        # Parse board_state to ensure it's valid JSON
-        json.loads(data['board_state'])
-        
         # Look for an existing unfinished game for this user
         game = Game.query.filter_by(user_id=data['user_id'], completed=False).first()
+        # A client that names the version it last saw must not overwrite a newer save
+        if game and data.get('version') is not None and data['version'] != game.version:
+            return jsonify({"message": "Saved game has changed", "version": game.version}), 409
+        
+        # Set when this save changes the user's statistics
+        user = None
         
         # Check if this is a new game creation 
         is_new_game = False
@@ -78,7 +335,7 @@ def save_game():
             
         if game:
             # Update existing game
-            game.board_state = data['board_state']
+            game.board_state = board_state
             was_completed = game.completed
             game.completed = data.get('completed', False)
             
@@ -87,25 +344,21 @@ def save_game():
                 game.hints_used = data['hints_used']
             if 'solved_by_algorithm' in data:
                 game.solved_by_algorithm = data['solved_by_algorithm']
+            if solution and not game.solution:
+                game.solution = solution
                 
             # If game is completed, update user statistics
             if data.get('completed', False) and not was_completed:
-                user = User.query.get(data['user_id'])
-                user.puzzles_played += 1
-                
                 # Count as solved only if user didn't use too many hints or the solve button
-                if game.hints_used <= 2 and not game.solved_by_algorithm:
-                    user.puzzles_solved += 1
-                
-                # Update win percentage
-                if user.puzzles_played > 0:
-                    user.win_percentage = (user.puzzles_solved / user.puzzles_played) * 100
+                solved = game.hints_used <= 2 and not game.solved_by_algorithm
+                user = record_played(data['user_id'], solved)
         else:
             # Create new game with original board state
             game = Game(
                 user_id=data['user_id'], 
-                board_state=data['board_state'],
-                original_board=data.get('original_board', data['board_state']),
+                board_state=board_state,
+                original_board=original_board,
+                solution=solution,
                 completed=data.get('completed', False),
                 hints_used=data.get('hints_used', 0),
                 solved_by_algorithm=data.get('solved_by_algorithm', False)
@@ -115,53 +368,302 @@ def save_game():
             # If this is a new game creation after explicitly starting a new game
             # (not just loading the app for the first time)
             if data.get('is_new_game', False):
-                user = User.query.get(data['user_id'])
                 # Increment games_played if the previous game was abandoned
-                previous_completed_game = Game.query.filter_by(
+                previous_completed_game = db.session.query(Game.id).filter_by(
                     user_id=data['user_id'], 
                     completed=True
-                ).order_by(Game.updated_at.desc()).first()
+                ).first()
                 
                 # If there's no previous completed game or the last game was explicitly marked as completed
                 if not previous_completed_game:
-                    user.puzzles_played += 1
-                    if user.puzzles_played > 0:
-                        user.win_percentage = (user.puzzles_solved / user.puzzles_played) * 100
+                    user = record_played(data['user_id'], False)
         
         db.session.commit()
-        return jsonify({"message": "Game saved successfully"}), 200
-    except json.JSONDecodeError:
-        return jsonify({"message": "Invalid board state format"}), 400
+        response_cache.invalidate(game_scope(data['user_id']))
+        if user is not None:
+            user_cache.put(user)
+            leaderboard.update(user)
+            response_cache.invalidate("leaderboard")
+        return jsonify({"message": "Game saved successfully", "version": game.version}), 200
+    except (IntegrityError, StaleDataError):
+        # Another request created or updated this user's active game first
+        db.session.rollback()
+        return jsonify({"message": "Game was modified concurrently, please retry"}), 409
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"message": f"Error saving game: {str(e)}"}), 500
+
+def parse_patches(patches):
+    """
+    Validate delta-save patches: a list of [row, col, value] with row and col
+    in 0-8 and value in 0-9 (0 clears the cell). Returns a list of
+    (index, value) pairs. Raises ValueError if malformed.
+    """
+    if not isinstance(patches, list):
+        raise ValueError("patches must be a list")
+    parsed = []
+    for patch in patches:
+        if not isinstance(patch, (list, tuple)) or len(patch) != 3:
+            raise ValueError("Each patch must be [row, col, value]")
+        row, col, value = patch
+        if not all(type(x) is int for x in patch) or not (0 <= row < 9 and 0 <= col < 9 and 0 <= value <= 9):
+            raise ValueError("Patch out of range")
+        parsed.append((row * 9 + col, value))
+    return parsed
+
+@app.route('/save_game/delta', methods=['POST'])
+def save_game_delta():
+    """
+    Apply changed cells to the user's unfinished game.
+    Body: user_id, version (from the last load or save), patches as
+    [[row, col, value], ...], and optionally hints_used and
+    solved_by_algorithm. The update only succeeds if the game is still at
+    the given version; otherwise 409 is returned with the current version
+    and the client should fall back to a full save. Completing a game goes
+    through /save_game, which also updates the statistics.
+    """
+    data = request.get_json()
+    if not data or 'user_id' not in data or 'version' not in data or 'patches' not in data:
+        return jsonify({"message": "Missing data"}), 400
+    try:
+        patches = parse_patches(data['patches'])
+    except ValueError as e:
+        return jsonify({"message": f"Invalid patches: {e}"}), 400
+    error = check_user(data['user_id'])
+    if error is not None:
+        return error
+    version = data['version']
+    
+    try:
+        game = db.session.query(
+            Game.id, Game.board_state, Game.original_board, Game.version
+        ).filter(Game.user_id == data['user_id'], Game.completed == False).first()
+        if not game:
+            return jsonify({"message": "No saved game found"}), 404
+        if game.version != version:
+            return jsonify({"message": "Saved game has changed", "version": game.version}), 409
+        
+        cells = bytearray(to_compact(game.board_state), 'ascii')
+        original = to_compact(game.original_board)
+        for index, value in patches:
+            if original[index] != '0':
+                return jsonify({"message": "Cannot change a given cell"}), 400
+            cells[index] = ord('0') + value
+        
+        values = {Game.board_state: cells.decode('ascii'), Game.version: version + 1}
+        if 'hints_used' in data:
+            values[Game.hints_used] = data['hints_used']
+        if 'solved_by_algorithm' in data:
+            values[Game.solved_by_algorithm] = data['solved_by_algorithm']
+        # Compare-and-set: matches no row if another save got in since the read above
+        updated = Game.query.filter(Game.id == game.id, Game.version == version) \
+            .update(values, synchronize_session=False)
+        if not updated:
+            db.session.rollback()
+            return jsonify({"message": "Saved game has changed"}), 409
+        db.session.commit()
+        response_cache.invalidate(game_scope(data['user_id']))
+        return jsonify({"message": "Game saved successfully", "version": version + 1}), 200
     except Exception as e:
         db.session.rollback()
         return jsonify({"message": f"Error saving game: {str(e)}"}), 500
 
 @app.route('/load_game/<int:user_id>', methods=['GET'])
+@user_route
+@cached_response(lambda user_id: game_scope(user_id))
 def load_game(user_id):
+    # Boards are returned as compact strings unless ?format=json or ?format=packed is requested
+    fmt = request.args.get('format', 'compact')
+    if fmt not in BOARD_FORMATS:
+        return jsonify({"message": "Unknown board format"}), 400
     try:
         game = Game.query.filter_by(user_id=user_id, completed=False).first()
         if game:
-            # Verify the JSON is valid
-            board = json.loads(game.board_state)
-            original = json.loads(game.original_board)
             return jsonify({
-                "board_state": game.board_state,
-                "original_board": game.original_board,
+                "board_state": format_board(game.board_state, fmt),
+                "original_board": format_board(game.original_board, fmt),
+                "solution": format_board(game.solution, fmt) if game.solution else None,
                 "hints_used": game.hints_used,
-                "solved_by_algorithm": game.solved_by_algorithm
+                "solved_by_algorithm": game.solved_by_algorithm,
+                "version": game.version
             }), 200
         else:
             return jsonify({"message": "No saved game found"}), 404
     except Exception as e:
         return jsonify({"message": f"Error loading game: {str(e)}"}), 500
 
+@app.route('/games/<int:user_id>/meta', methods=['GET', 'HEAD'])
+@user_route
+@cached_response(lambda user_id: game_scope(user_id))
+def game_meta(user_id):
+    """
+    Whether the user has an unfinished game, without its boards. Read from
+    the ix_games_user_meta index alone; HEAD returns just the status code.
+    """
+    try:
+        game = db.session.query(
+            Game.id, Game.created_at, Game.updated_at, Game.hints_used
+        ).filter(Game.user_id == user_id, Game.completed == False).first()
+        if game:
+            return jsonify({
+                "game_id": game.id,
+                "created_at": game.created_at.isoformat() if game.created_at else None,
+                "updated_at": game.updated_at.isoformat() if game.updated_at else None,
+                "hints_used": game.hints_used
+            }), 200
+        return jsonify({"message": "No saved game found"}), 404
+    except Exception as e:
+        return jsonify({"message": f"Error loading game: {str(e)}"}), 500
+
+# Rows per IN (...) lookup in bulk requests; SQLite allows 999 bound parameters
+BULK_CHUNK_SIZE = 500
+
+def _chunks(items, size=BULK_CHUNK_SIZE):
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+def _game_line(game, fmt):
+    return json.dumps({
+        "user_id": game.user_id,
+        "board_state": format_board(game.board_state, fmt),
+        "original_board": format_board(game.original_board, fmt),
+        "solution": format_board(game.solution, fmt) if game.solution else None,
+        "hints_used": game.hints_used,
+        "solved_by_algorithm": game.solved_by_algorithm,
+        "version": game.version,
+        "updated_at": game.updated_at.isoformat() if game.updated_at else None
+    }) + "\n"
+
+@app.route('/games/bulk', methods=['GET'])
+@admin_route
+def export_games():
+    """
+    Stream unfinished games as NDJSON, one game per line, ordered by user.
+    ?user_ids=1,2,3 limits the export to those users; ?format= picks the
+    board format as for /load_game.
+    """
+    try:
+        user_ids = [int(x) for x in request.args.get('user_ids', '').split(',') if x.strip()]
+    except ValueError:
+        return jsonify({"message": "user_ids must be a comma-separated list of ids"}), 400
+    fmt = request.args.get('format', 'compact')
+    if fmt not in BOARD_FORMATS:
+        return jsonify({"message": "Unknown board format"}), 400
+    
+    games = Game.__table__
+    columns = (games.c.user_id, games.c.board_state, games.c.original_board, games.c.solution,
+               games.c.hints_used, games.c.solved_by_algorithm, games.c.version, games.c.updated_at)
+    
+    def generate():
+        base = db.select(*columns).where(games.c.completed == False).order_by(games.c.user_id)
+        if not user_ids:
+            result = db.session.connection().execution_options(stream_results=True).execute(base)
+            for rows in iter(lambda: result.fetchmany(BULK_CHUNK_SIZE), []):
+                yield "".join(_game_line(row, fmt) for row in rows)
+            return
+        for chunk in _chunks(sorted(set(user_ids))):
+            rows = db.session.execute(base.where(games.c.user_id.in_(chunk))).fetchall()
+            yield "".join(_game_line(row, fmt) for row in rows)
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+def _parse_bulk_game(line):
+    """Validate one NDJSON line of a bulk import into a dict of column values."""
+    data = json.loads(line)
+    if not isinstance(data, dict) or type(data.get('user_id')) is not int or 'board_state' not in data:
+        raise ValueError("Each game needs an integer user_id and a board_state")
+    board_state = compact_board(data['board_state'])
+    return {
+        'user_id': data['user_id'],
+        'board_state': board_state,
+        'original_board': compact_board(data.get('original_board', data['board_state'])),
+        'solution': compact_board(data['solution']) if data.get('solution') else None,
+        'hints_used': int(data.get('hints_used', 0)),
+        'solved_by_algorithm': bool(data.get('solved_by_algorithm', False)),
+        'completed': bool(data.get('completed', False)),
+    }
+
+@app.route('/games/bulk', methods=['POST'])
+@admin_route
+def import_games():
+    """
+    Create or replace unfinished games from an NDJSON body, one game per
+    line with the /save_game fields. A user's unfinished game is updated in
+    place, otherwise a game is created; if a user appears more than once the
+    last line wins. Everything is written in one transaction with batched
+    INSERT and UPDATE statements, and nothing is written if any line is
+    invalid. User statistics are not changed.
+    """
+    games_by_user = {}
+    for line_no, line in enumerate(request.stream, 1):
+        if not line.strip():
+            continue
+        try:
+            game = _parse_bulk_game(line)
+        except (ValueError, TypeError) as e:
+            return jsonify({"message": f"Invalid game on line {line_no}: {e}"}), 400
+        games_by_user[game['user_id']] = game
+    
+    games = Game.__table__
+    users = User.__table__
+    try:
+        known_users = set()
+        active = {}  # user_id -> id of the unfinished game
+        for chunk in _chunks(games_by_user):
+            known_users.update(db.session.execute(
+                db.select(users.c.id).where(users.c.id.in_(chunk))).scalars())
+            active.update(db.session.execute(
+                db.select(games.c.user_id, games.c.id)
+                .where(games.c.user_id.in_(chunk), games.c.completed == False)).fetchall())
+        unknown = sorted(set(games_by_user) - known_users)
+        if unknown:
+            return jsonify({"message": "Unknown users", "user_ids": unknown}), 400
+        
+        now = datetime.utcnow()
+        # New games start at version 1, as ORM inserts (version_id_col) do
+        inserts = [dict(game, created_at=now, updated_at=now, version=1)
+                   for user_id, game in games_by_user.items() if user_id not in active]
+        updates = [{'b_id': active[user_id], 'b_board_state': game['board_state'],
+                    'b_original_board': game['original_board'], 'b_solution': game['solution'],
+                    'b_hints_used': game['hints_used'], 'b_solved_by_algorithm': game['solved_by_algorithm'],
+                    'b_completed': game['completed'], 'b_updated_at': now}
+                   for user_id, game in games_by_user.items() if user_id in active]
+        if inserts:
+            db.session.execute(games.insert(), inserts)
+        if updates:
+            db.session.execute(
+                games.update().where(games.c.id == bindparam('b_id')).values(
+                    board_state=bindparam('b_board_state'),
+                    original_board=bindparam('b_original_board'),
+                    solution=bindparam('b_solution'),
+                    hints_used=bindparam('b_hints_used'),
+                    solved_by_algorithm=bindparam('b_solved_by_algorithm'),
+                    completed=bindparam('b_completed'),
+                    updated_at=bindparam('b_updated_at'),
+                    version=games.c.version + 1),
+                updates)
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({"message": "Games were modified concurrently, please retry"}), 409
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"message": f"Error importing games: {str(e)}"}), 500
+    
+    for user_id in games_by_user:
+        response_cache.invalidate(game_scope(user_id))
+    return jsonify({"message": "Games imported", "inserted": len(inserts), "updated": len(updates)}), 200
+
 @app.route('/delete_game/<int:user_id>', methods=['DELETE'])
+@user_route
 def delete_game(user_id):
     try:
         game = Game.query.filter_by(user_id=user_id, completed=False).first()
         if game:
             db.session.delete(game)
             db.session.commit()
+            response_cache.invalidate(game_scope(user_id))
             return jsonify({"message": "Game deleted"}), 200
         return jsonify({"message": "No game to delete"}), 404
     except Exception as e:
@@ -169,28 +671,65 @@ def delete_game(user_id):
         return jsonify({"message": f"Error deleting game: {str(e)}"}), 500
 
 @app.route('/leaderboard', methods=['GET'])
+@cached_response(lambda: "leaderboard")
 def get_leaderboard():
+    """
+    One page of the ranking. Query parameters:
+    limit (default 50, at most 500), offset, or cursor (the next_cursor of
+    the previous page), and user_id to also get that user's own row.
+    """
     try:
-        # Get all users (not just those who have played games)
-        users = User.query.order_by(User.win_percentage.desc(), User.puzzles_solved.desc()).all()
-        
-        leaderboard = []
-        for user in users:
-            leaderboard.append({
-                "username": user.username,
-                "puzzles_played": user.puzzles_played,
-                "puzzles_solved": user.puzzles_solved,
-                "win_percentage": round(user.win_percentage, 2)
-            })
-            
-        return jsonify({"leaderboard": leaderboard}), 200
+        limit = min(max(int(request.args.get('limit', 50)), 1), 500)
+        offset = max(int(request.args.get('offset', 0)), 0)
+        user_id = request.args.get('user_id', type=int)
+        rows, next_cursor, total = leaderboard.page(limit, offset, request.args.get('cursor'))
+    except ValueError:
+        return jsonify({"message": "Invalid leaderboard parameters"}), 400
     except Exception as e:
         return jsonify({"message": f"Error fetching leaderboard: {str(e)}"}), 500
+    
+    response = {"leaderboard": rows, "next_cursor": next_cursor, "total": total}
+    if user_id is not None:
+        response["me"] = leaderboard.rank(user_id)
+    return jsonify(response), 200
+
+@app.route('/puzzles/next', methods=['GET'])
+def next_puzzle():
+    """
+    A puzzle from the shared bank (see puzzle_bank.py): ?difficulty=easy,
+    medium (default) or hard. Returns its id and the givens and solution as
+    81-digit strings. Every call hands out a different puzzle.
+    """
+    difficulty = request.args.get('difficulty', 'medium')
+    if difficulty not in DIFFICULTIES:
+        return jsonify({"message": "Unknown difficulty"}), 400
+    try:
+        puzzle_id, givens, solution = puzzle_bank.take(difficulty)
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"message": f"Error fetching puzzle: {str(e)}"}), 500
+    return jsonify({
+        "id": puzzle_id,
+        "difficulty": difficulty,
+        "givens": givens,
+        "solution": solution
+    }), 200, {"Cache-Control": "no-store"}
+
+def prepare_database(puzzle_workers=0):
+    """
+    Create missing tables, apply schema upgrades and start refilling the
+    puzzle bank, generating in puzzle_workers processes if given.
+    """
+    with app.app_context():
+        db.create_all()
+        upgrade(db.engine)
+    puzzle_bank.start(app, workers=puzzle_workers)
 
 def run_backend():
     try:
-        with app.app_context():
-            db.create_all()
+        prepare_database()
+        # Speak HTTP/1.1 so the frontend's pooled connections are kept alive between requests
+        WSGIRequestHandler.protocol_version = "HTTP/1.1"
         # Run on port 5000 and bind to localhost
         app.run(host='127.0.0.1', port=5000, debug=False)
     except Exception as e:
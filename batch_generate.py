@@ -0,0 +1,104 @@
+# batch_generate.py
+"""
+Generate large batches of unique puzzles across a process pool.
+
+    python batch_generate.py 10000 --difficulty hard --workers 8 --output hard.txt
+
+Puzzles are written as they complete, so a long run can be interrupted
+without losing the puzzles produced so far. The default text format is one
+81-character puzzle per line; --format binary writes 41-byte packed records.
+With --solutions each record is followed by the puzzle's solution (after a
+space in text format).
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+from sudoku_logic import generate_puzzle, board_to_string, pack_board
+
+def _generate_one(task):
+    """Worker entry point: generate one (puzzle, solution) pair with its own RNG seed."""
+    difficulty, seed = task
+    random.seed(seed)
+    return generate_puzzle(difficulty)
+
+def generate_many(count, difficulty='medium', workers=None, seed=None, chunksize=8):
+    """
+    Yield count unique (puzzle, solution) pairs of the given difficulty, in
+    completion order.
+
+    Generation is spread over a pool of worker processes (os.cpu_count()
+    by default). Every task carries its own 64-bit seed, drawn from the OS
+    entropy source, or from seed when given so a batch can be reproduced.
+    Duplicate puzzles are dropped and replaced.
+    """
+    if count <= 0:
+        return
+    workers = workers or os.cpu_count() or 1
+    seeds = random.Random(seed) if seed is not None else random.SystemRandom()
+    seen = set()
+
+    with multiprocessing.Pool(processes=workers) as pool:
+        while len(seen) < count:
+            tasks = [(difficulty, seeds.getrandbits(64)) for _ in range(count - len(seen))]
+            for puzzle, solution in pool.imap_unordered(_generate_one, tasks, chunksize):
+                key = board_to_string(puzzle)
+                if key in seen:
+                    continue
+                seen.add(key)
+                yield puzzle, solution
+
+def encode_puzzle(puzzle, solution=None, fmt='text'):
+    """
+    Encode a puzzle, and its solution if given, as a bytes record: an
+    81-character line or 41 packed bytes per board.
+    """
+    boards = [puzzle] if solution is None else [puzzle, solution]
+    if fmt == 'binary':
+        return b"".join(pack_board(board) for board in boards)
+    return (" ".join(board_to_string(board) for board in boards) + '\n').encode('ascii')
+
+def write_puzzles(path, count, difficulty='medium', workers=None, seed=None, fmt='text',
+                  with_solutions=False):
+    """
+    Generate puzzles with generate_many() and append each one to path as it
+    completes. Returns the number of puzzles written.
+    """
+    written = 0
+    with open(path, 'ab') as f:
+        for puzzle, solution in generate_many(count, difficulty, workers, seed):
+            f.write(encode_puzzle(puzzle, solution if with_solutions else None, fmt))
+            f.flush()
+            written += 1
+    return written
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate Sudoku puzzles in parallel")
+    parser.add_argument("count", type=int, help="number of unique puzzles to generate")
+    parser.add_argument("--difficulty", default="medium", choices=["easy", "medium", "hard"])
+    parser.add_argument("--workers", type=int, default=None,
+                        help="worker processes (default: CPU count)")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="master seed for reproducible batches")
+    parser.add_argument("--format", dest="fmt", default="text", choices=["text", "binary"],
+                        help="81-character lines or 41-byte packed records")
+    parser.add_argument("--solutions", action="store_true",
+                        help="write each puzzle's solution after it")
+    parser.add_argument("--output", default="puzzles.txt",
+                        help="file to append puzzles to ('-' for stdout)")
+    args = parser.parse_args(argv)
+
+    if args.output == '-':
+        out = sys.stdout.buffer
+        for puzzle, solution in generate_many(args.count, args.difficulty, args.workers, args.seed):
+            out.write(encode_puzzle(puzzle, solution if args.solutions else None, args.fmt))
+            out.flush()
+        return
+
+    written = write_puzzles(args.output, args.count, args.difficulty, args.workers, args.seed,
+                            args.fmt, args.solutions)
+    print(f"Wrote {written} {args.difficulty} puzzles to {args.output}")
+
+if __name__ == "__main__":
+    main()
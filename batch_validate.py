@@ -0,0 +1,146 @@
+# batch_validate.py
+"""
+Validate many boards at once.
+
+    python batch_validate.py
+
+With no arguments, re-validates every game stored in sudoku.db and lists
+the ones whose current board breaks the Sudoku rules.
+"""
+import argparse
+from sudoku_logic import string_to_board, is_compact_board, to_compact
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; validate_batch() falls back to pure Python
+    np = None
+
+def validate_batch(boards, use_numpy=None):
+    """
+    Check a batch of boards for duplicate digits in rows, columns and boxes.
+
+    boards is an (N, 9, 9) uint8 array or any sequence of 9x9 boards.
+    Returns (valid, conflicts): valid[n] is True if board n follows the
+    rules, and conflicts[n][r][c] is True for every cell taking part in a
+    duplicate (or holding a value above 9). Empty cells (0) never conflict.
+
+    With NumPy available the result is a pair of bool arrays of shape (N,)
+    and (N, 9, 9); otherwise, or with use_numpy=False, a pair of lists.
+    """
+    if use_numpy is None:
+        use_numpy = np is not None
+    if use_numpy:
+        if np is None:
+            raise RuntimeError("NumPy is not installed")
+        return _validate_numpy(boards)
+    return _validate_python(boards)
+
+def _validate_numpy(boards):
+    boards = np.asarray(boards, dtype=np.uint8)
+    if boards.ndim != 3 or boards.shape[1:] != (9, 9):
+        raise ValueError("Expected an array of shape (N, 9, 9)")
+    n = boards.shape[0]
+
+    # One-hot digits: onehot[n, r, c, d] is True when cell (r, c) holds d + 1
+    onehot = boards[..., None] == np.arange(1, 10, dtype=np.uint8)
+    row_dup = onehot.sum(axis=2) > 1                                   # (N, row, digit)
+    col_dup = onehot.sum(axis=1) > 1                                   # (N, col, digit)
+    box_dup = onehot.reshape(n, 3, 3, 3, 3, 9).sum(axis=(2, 4)) > 1    # (N, box row, box col, digit)
+    box_dup = box_dup.repeat(3, axis=1).repeat(3, axis=2)              # (N, row, col, digit)
+
+    duplicated = row_dup[:, :, None, :] | col_dup[:, None, :, :] | box_dup
+    conflicts = (onehot & duplicated).any(axis=3) | (boards > 9)
+    valid = ~conflicts.reshape(n, 81).any(axis=1)
+    return valid, conflicts
+
+def _validate_python(boards):
+    valid = []
+    conflicts = []
+    for board in boards:
+        cells = [cell for row in board for cell in row]
+        if len(cells) != 81:
+            raise ValueError("Expected 9x9 boards")
+        # Map each (unit, digit) to the cells holding it
+        seen = {}
+        for i, val in enumerate(cells):
+            if val == 0:
+                continue
+            r, c = divmod(i, 9)
+            b = (r // 3) * 3 + c // 3
+            for unit in (('r', r), ('c', c), ('b', b)):
+                seen.setdefault((unit, val), []).append(i)
+        mask = [val > 9 for val in cells]
+        for positions in seen.values():
+            if len(positions) > 1:
+                for i in positions:
+                    mask[i] = True
+        valid.append(not any(mask))
+        conflicts.append([mask[i:i + 9] for i in range(0, 81, 9)])
+    return valid, conflicts
+
+def boards_from_strings(board_strings):
+    """
+    Decode stored board strings into a batch for validate_batch().
+    Compact strings are decoded in one step when NumPy is available;
+    legacy JSON strings are decoded one at a time.
+    """
+    board_strings = list(board_strings)
+    if np is not None and all(is_compact_board(s) for s in board_strings):
+        digits = np.frombuffer("".join(board_strings).encode("ascii"), dtype=np.uint8) - ord("0")
+        return digits.reshape(len(board_strings), 9, 9)
+    return [string_to_board(s) for s in board_strings]
+
+def audit_games(batch_size=1000):
+    """
+    Re-validate the current board of every stored game.
+    Returns the ids of games whose board breaks the rules or cannot be decoded.
+    """
+    from backend import app
+    from database import Game
+
+    invalid = []
+    with app.app_context():
+        query = Game.query.with_entities(Game.id, Game.board_state).order_by(Game.id)
+        batch = []
+        for row in query.yield_per(batch_size):
+            batch.append(row)
+            if len(batch) >= batch_size:
+                invalid.extend(_audit_batch(batch))
+                batch = []
+        if batch:
+            invalid.extend(_audit_batch(batch))
+    return sorted(invalid)
+
+def _audit_batch(rows):
+    invalid = []
+    game_ids = []
+    board_strings = []
+    for game_id, board_state in rows:
+        if not is_compact_board(board_state):
+            try:
+                board_state = to_compact(board_state)  # Legacy JSON row
+            except (ValueError, TypeError):
+                board_state = None
+            if board_state is None or not is_compact_board(board_state):
+                invalid.append(game_id)  # Cannot be decoded as a 9x9 board of digits
+                continue
+        game_ids.append(game_id)
+        board_strings.append(board_state)
+    if game_ids:
+        valid, _ = validate_batch(boards_from_strings(board_strings))
+        invalid.extend(game_id for game_id, ok in zip(game_ids, valid) if not ok)
+    return invalid
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Re-validate every stored game")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    invalid = audit_games(args.batch_size)
+    if invalid:
+        print(f"{len(invalid)} invalid games: {', '.join(str(game_id) for game_id in invalid)}")
+    else:
+        print("All stored games are valid")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+# benchmark.py
+"""
+Micro-benchmarks for the Sudoku engines.
+
+    python benchmark.py count --puzzles 20 --seed 1
+    python benchmark.py generate --puzzles 20 --seed 1
+
+"count" reports the per-puzzle latency of count_solutions() for each
+uniqueness oracle on the same set of generated puzzles. "generate" reports
+generate_board() latency for each carving mode.
+"""
+import argparse
+import random
+import statistics
+import time
+
+from sudoku_logic import ORACLES, count_solutions, generate_board
+
+CARVING_MODES = (('incremental', None),) + tuple(('recount', oracle) for oracle in ORACLES)
+
+def make_puzzles(count, difficulty, seed):
+    """Generate a reproducible list of puzzles."""
+    random.seed(seed)
+    return [generate_board(difficulty) for _ in range(count)]
+
+def time_calls(func, boards, repeat):
+    """Return the best-of-repeat latency in milliseconds for each board."""
+    latencies = []
+    for board in boards:
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func(board)
+            elapsed = (time.perf_counter() - start) * 1000
+            best = elapsed if best is None else min(best, elapsed)
+        latencies.append(best)
+    return latencies
+
+def summarize(name, latencies):
+    ordered = sorted(latencies)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    print(f"  {name:<20} mean {statistics.mean(ordered):9.2f} ms"
+          f"   median {statistics.median(ordered):9.2f} ms"
+          f"   p95 {p95:9.2f} ms")
+
+def bench_count(args):
+    for difficulty in args.difficulty:
+        puzzles = make_puzzles(args.puzzles, difficulty, args.seed)
+        print(f"count_solutions, {difficulty}, {len(puzzles)} puzzles:")
+        for oracle in ORACLES:
+            latencies = time_calls(
+                lambda board: count_solutions(board, oracle=oracle), puzzles, args.repeat)
+            summarize(oracle, latencies)
+
+def bench_generate(args):
+    for difficulty in args.difficulty:
+        print(f"generate_board, {difficulty}, {args.puzzles} puzzles:")
+        for carving, oracle in CARVING_MODES:
+            random.seed(args.seed)
+            latencies = time_calls(
+                lambda _: generate_board(difficulty, oracle=oracle, carving=carving),
+                range(args.puzzles), 1)
+            summarize(carving if oracle is None else f"{carving}/{oracle}", latencies)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sudoku engine benchmarks")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    count = sub.add_parser("count", help="uniqueness oracle latency per puzzle")
+    count.add_argument("--puzzles", type=int, default=20)
+    count.add_argument("--difficulty", nargs="+", default=["easy", "medium", "hard"],
+                       choices=["easy", "medium", "hard"])
+    count.add_argument("--repeat", type=int, default=3)
+    count.add_argument("--seed", type=int, default=1)
+    count.set_defaults(func=bench_count)
+
+    generate = sub.add_parser("generate", help="puzzle generation latency per carving mode")
+    generate.add_argument("--puzzles", type=int, default=10)
+    generate.add_argument("--difficulty", nargs="+", default=["easy", "medium", "hard"],
+                          choices=["easy", "medium", "hard"])
+    generate.add_argument("--seed", type=int, default=1)
+    generate.set_defaults(func=bench_generate)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+if __name__ == "__main__":
+    main()
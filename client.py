@@ -0,0 +1,177 @@
+# client.py
+import json
+import os
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+
+API_URL = "http://localhost:5000"
+
+# Seconds to wait for a response unless a call says otherwise
+DEFAULT_TIMEOUT = 10
+
+class SudokuClient:
+    """
+    HTTP client for the backend API.
+
+    All requests share one requests.Session, so connections are kept alive
+    and reused instead of opened per call, and every request has a timeout.
+
+    The API methods are synchronous and return (status_code, json_data);
+    they may be called from any thread. run() executes a call on the
+    client's thread pool instead and returns a Future. A callback given to
+    run() is invoked as callback(result, error) by poll(), so a Tk app that
+    calls poll() periodically with root.after() gets results on its own
+    thread.
+    """
+
+    def __init__(self, base_url=API_URL, timeout=DEFAULT_TIMEOUT, workers=4, admin_token=None):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        # Sent to the admin-only bulk routes instead of the session token
+        self.admin_token = admin_token or os.environ.get("SUDOKU_ADMIN_TOKEN")
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers + 1)  # +1 for the save worker
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="sudoku-client")
+        self._callbacks = deque()  # (callback, result, error) awaiting poll()
+        self._etags = {}           # (path, params) -> (ETag, JSON data) of the last 200 response
+        self._etag_lock = threading.Lock()
+
+    def _url(self, path):
+        return f"{self.base_url}{path}"
+
+    def _request(self, method, path, timeout=None, **kwargs):
+        return self.session.request(method, self._url(path),
+                                    timeout=self.timeout if timeout is None else timeout, **kwargs)
+
+    def _json(self, method, path, timeout=None, **kwargs):
+        response = self._request(method, path, timeout, **kwargs)
+        return response.status_code, response.json()
+
+    def _cached_get(self, path, params=None, timeout=None):
+        """
+        GET with If-None-Match when a previous copy is held, so unchanged
+        data comes back as an empty 304 and the copy is reused.
+        """
+        key = (path, tuple(sorted((params or {}).items())))
+        with self._etag_lock:
+            cached = self._etags.get(key)
+        headers = {"If-None-Match": cached[0]} if cached else {}
+        response = self._request("GET", path, timeout, params=params, headers=headers)
+        if response.status_code == 304 and cached:
+            return 200, cached[1]
+        data = response.json()
+        etag = response.headers.get("ETag")
+        with self._etag_lock:
+            if response.status_code == 200 and etag:
+                self._etags[key] = (etag, data)
+            else:
+                self._etags.pop(key, None)
+        return response.status_code, data
+
+    # --- API calls ---
+
+    def is_available(self, timeout=2):
+        """True if the backend answers its health check."""
+        try:
+            self._request("GET", "/", timeout)
+            return True
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+            return False
+
+    def login(self, username, password):
+        """Log in; on success the session token is sent with every later request."""
+        status, data = self._json("POST", "/login", json={"username": username, "password": password})
+        if status == 200 and data.get("token"):
+            self.set_token(data["token"])
+        return status, data
+
+    def set_token(self, token):
+        """Authenticate later requests with a session token from /login, or stop with None."""
+        if token:
+            self.session.headers["Authorization"] = f"Bearer {token}"
+        else:
+            self.session.headers.pop("Authorization", None)
+
+    def register(self, username, password):
+        return self._json("POST", "/register", json={"username": username, "password": password})
+
+    def game_exists(self, user_id):
+        """True if the user has an unfinished game (a HEAD request; no boards are sent)."""
+        return self._request("HEAD", f"/games/{user_id}/meta").status_code == 200
+
+    def load_game(self, user_id):
+        return self._cached_get(f"/load_game/{user_id}")
+
+    def save_game(self, game):
+        return self._json("POST", "/save_game", json=game)
+
+    def save_game_delta(self, delta):
+        return self._json("POST", "/save_game/delta", json=delta)
+
+    def delete_game(self, user_id):
+        return self._json("DELETE", f"/delete_game/{user_id}")
+
+    def next_puzzle(self, difficulty):
+        """A new puzzle from the server's bank: (status, {"id", "difficulty", "givens", "solution"})."""
+        return self._json("GET", "/puzzles/next", params={"difficulty": difficulty})
+
+    def leaderboard(self, limit, user_id=None):
+        params = {"limit": limit}
+        if user_id is not None:
+            params["user_id"] = user_id
+        return self._cached_get("/leaderboard", params)
+
+    def _admin_headers(self):
+        return {"Authorization": f"Bearer {self.admin_token}"} if self.admin_token else {}
+
+    def export_games(self, user_ids=None, timeout=None):
+        """Yield unfinished games (dicts) from /games/bulk as they stream in. Needs admin_token."""
+        params = {"user_ids": ",".join(str(user_id) for user_id in user_ids)} if user_ids else None
+        with self._request("GET", "/games/bulk", timeout, params=params, stream=True,
+                           headers=self._admin_headers()) as response:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if line:
+                    yield json.loads(line)
+
+    def import_games(self, games, timeout=None):
+        """Upload an iterable of game dicts to /games/bulk as a streamed NDJSON body. Needs admin_token."""
+        body = (json.dumps(game).encode("utf-8") + b"\n" for game in games)
+        return self._json("POST", "/games/bulk", timeout, data=body,
+                          headers={"Content-Type": "application/x-ndjson", **self._admin_headers()})
+
+    # --- Background calls ---
+
+    def run(self, fn, *args, callback=None, **kwargs):
+        """
+        Call fn(*args, **kwargs) on the thread pool, typically one of the API
+        methods above. Returns a Future; if callback is given, poll() later
+        calls callback(result, error) with exactly one of them set.
+        """
+        future = self._executor.submit(fn, *args, **kwargs)
+        if callback is not None:
+            future.add_done_callback(lambda f: self._callbacks.append(
+                (callback, None, f.exception()) if f.exception() is not None
+                else (callback, f.result(), None)))
+        return future
+
+    def poll(self):
+        """Run the callbacks of calls finished since the last poll. Returns how many."""
+        count = 0
+        while True:
+            try:
+                callback, result, error = self._callbacks.popleft()
+            except IndexError:
+                return count
+            callback(result, error)
+            count += 1
+
+    def close(self):
+        """Stop the thread pool, without waiting for calls in flight, and close connections."""
+        self._executor.shutdown(wait=False)
+        self.session.close()
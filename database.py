@@ -1,11 +1,16 @@
 # database.py
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
+from sudoku_logic import board_to_string, pack_board, string_to_board, unpack_board
 
 db = SQLAlchemy()
 
 class User(db.Model):
     __tablename__ = 'users'
+    __table_args__ = (
+        # Leaderboard ordering
+        db.Index('ix_users_win_solved', 'win_percentage', 'puzzles_solved'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(50), unique=True, nullable=False)
     password = db.Column(db.String(200), nullable=False)
@@ -19,12 +24,100 @@ class User(db.Model):
 
 class Game(db.Model):
     __tablename__ = 'games'
+    __table_args__ = (
+        # Serves the per-user active/completed game lookups and their updated_at ordering,
+        # and covers the /games/<user_id>/meta columns (id is the rowid) without touching the table
+        db.Index('ix_games_user_meta', 'user_id', 'completed', 'updated_at', 'created_at', 'hints_used'),
+        # At most one unfinished game per user
+        db.Index('uq_games_active_user', 'user_id', unique=True,
+                 sqlite_where=db.text('completed = 0'),
+                 postgresql_where=db.text('completed = false')),
+    )
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
-    board_state = db.Column(db.Text, nullable=False)  # Stores board as JSON string
-    original_board = db.Column(db.Text, nullable=False)  # Stores original board state
+    board_state = db.Column(db.Text, nullable=False)  # Stores board as 81-digit string (older rows: JSON)
+    original_board = db.Column(db.Text, nullable=False)  # Stores original board state, same format
     completed = db.Column(db.Boolean, default=False)
     hints_used = db.Column(db.Integer, default=0)  # Track hints used
     solved_by_algorithm = db.Column(db.Boolean, default=False)  # Track if solved button was used
+    solution = db.Column(db.Text, nullable=True)  # Solution of original_board, same format (unknown for older games)
+    version = db.Column(db.Integer, nullable=False, default=0)  # Bumped by every save; checked by delta saves
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
\ No newline at end of file
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # ORM flushes bump version and fail with StaleDataError if the row changed since it was read
+    __mapper_args__ = {'version_id_col': version}
+
+    @property
+    def board(self):
+        """Current board as a list of lists, decoded from either storage format."""
+        return string_to_board(self.board_state)
+
+    @board.setter
+    def board(self, board):
+        self.board_state = board_to_string(board)
+
+    @property
+    def packed_board(self):
+        """Current board as its 41 packed bytes (see sudoku_logic.pack_board)."""
+        return pack_board(self.board)
+
+    @packed_board.setter
+    def packed_board(self, data):
+        self.board = unpack_board(data)
+
+    @property
+    def original(self):
+        """Original (given) board as a list of lists."""
+        return string_to_board(self.original_board)
+
+    @original.setter
+    def original(self, board):
+        self.original_board = board_to_string(board)
+
+    @property
+    def solution_board(self):
+        """Solution as a list of lists, or None if it was never stored."""
+        return string_to_board(self.solution) if self.solution else None
+
+    @solution_board.setter
+    def solution_board(self, board):
+        self.solution = board_to_string(board) if board is not None else None
+
+class ArchivedGame(db.Model):
+    """
+    Unfinished game set aside by the migration that allowed one active game
+    per user (see migrations.py). Kept as it was, outside games, so it
+    counts neither as active nor as completed.
+    """
+    __tablename__ = 'archived_games'
+    id = db.Column(db.Integer, primary_key=True)  # Its id in games
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+    board_state = db.Column(db.Text, nullable=False)
+    original_board = db.Column(db.Text, nullable=False)
+    hints_used = db.Column(db.Integer, default=0)
+    solved_by_algorithm = db.Column(db.Boolean, default=False)
+    solution = db.Column(db.Text, nullable=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class Puzzle(db.Model):
+    """
+    Pre-generated puzzle in the shared bank (see puzzle_bank.py). Served
+    puzzles keep their row, so a puzzle id always names the same puzzle.
+    """
+    __tablename__ = 'puzzle_bank'
+    __table_args__ = (
+        # Next unserved puzzle of a difficulty, in generation order
+        db.Index('ix_puzzle_bank_unserved', 'difficulty', 'id',
+                 sqlite_where=db.text('served_at IS NULL'),
+                 postgresql_where=db.text('served_at IS NULL')),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    difficulty = db.Column(db.String(10), nullable=False)
+    givens = db.Column(db.Text, nullable=False)    # 81-digit string, 0 for empty cells
+    solution = db.Column(db.Text, nullable=False)  # 81-digit string
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    served_at = db.Column(db.DateTime, nullable=True)  # Set when handed out by /puzzles/next
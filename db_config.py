@@ -0,0 +1,98 @@
+# db_config.py
+"""
+Database connection settings for the backend.
+
+The database URL and pool sizes come from environment variables, so the
+same models can run against the bundled SQLite file or a PostgreSQL server:
+
+    SUDOKU_DATABASE_URL   SQLAlchemy URL (default: sqlite file next to the app)
+    SUDOKU_DB_POOL_SIZE   connections kept open in the pool (default 5)
+    SUDOKU_DB_MAX_OVERFLOW  extra connections allowed under load (default 10)
+    SUDOKU_DB_POOL_TIMEOUT  seconds to wait for a free connection (default 30)
+
+Every SQLite connection is set up with the pragmas below: WAL journaling
+so readers never block the writer, synchronous=NORMAL (durable in WAL
+mode except for the last transactions on power loss), a busy timeout so
+competing writers wait instead of failing, and larger page and mmap caches.
+
+async_backend.py reaches the same database through SQLAlchemy's asyncio
+engine; async_database_url() picks the matching async driver (aiosqlite
+for SQLite, asyncpg for PostgreSQL).
+"""
+import os
+import sqlite3
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+def env_int(name, default):
+    """Integer environment variable, or default when it is unset or empty."""
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+# Pragmas applied to every new SQLite connection
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': env_int('SUDOKU_SQLITE_BUSY_TIMEOUT', 30000),        # milliseconds
+    'mmap_size': env_int('SUDOKU_SQLITE_MMAP_SIZE', 256 * 1024 * 1024),  # bytes
+    'cache_size': -env_int('SUDOKU_SQLITE_CACHE_KB', 64 * 1024),         # negative: KiB, not pages
+}
+
+def database_url(default_path):
+    """The configured database URL, or a SQLite file at default_path."""
+    return os.environ.get('SUDOKU_DATABASE_URL') or f'sqlite:///{default_path}'
+
+def engine_options(url):
+    """create_engine() options for the URL: a sized connection pool, plus SQLite specifics."""
+    url = make_url(url)
+    options = {
+        'pool_size': env_int('SUDOKU_DB_POOL_SIZE', 5),
+        'max_overflow': env_int('SUDOKU_DB_MAX_OVERFLOW', 10),
+        'pool_timeout': env_int('SUDOKU_DB_POOL_TIMEOUT', 30),
+    }
+    if url.get_backend_name() == 'sqlite':
+        if url.database in (None, '', ':memory:'):
+            return {}  # In-memory databases use a single shared connection
+        # Pooled connections move between request threads, one thread at a time
+        options['poolclass'] = QueuePool
+        options['connect_args'] = {'check_same_thread': False,
+                                   'timeout': SQLITE_PRAGMAS['busy_timeout'] / 1000}
+    else:
+        options['pool_pre_ping'] = True  # Replace connections the server has closed
+        options['pool_recycle'] = 1800
+    return options
+
+# Async driver used for each backend by async_backend.py
+ASYNC_DRIVERS = {'sqlite': 'sqlite+aiosqlite', 'postgresql': 'postgresql+asyncpg'}
+
+def async_database_url(default_path):
+    """The configured database URL with its driver replaced by the async one."""
+    url = make_url(database_url(default_path))
+    return url.set(drivername=ASYNC_DRIVERS.get(url.get_backend_name(), url.drivername))
+
+def async_engine_options(url):
+    """create_async_engine() options: engine_options() with the asyncio pool."""
+    options = engine_options(url)
+    if options.get('poolclass') is QueuePool:
+        options['poolclass'] = AsyncAdaptedQueuePool
+        # aiosqlite runs each connection on its own thread already
+        options['connect_args'] = {'timeout': SQLITE_PRAGMAS['busy_timeout'] / 1000}
+    return options
+
+def configure(app, default_path):
+    """Point app's Flask-SQLAlchemy settings at the configured database."""
+    url = database_url(default_path)
+    app.config['SQLALCHEMY_DATABASE_URI'] = url
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(url)
+
+@event.listens_for(Engine, 'connect')
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    # sqlite3 connections, or SQLAlchemy's adapter around an aiosqlite one
+    if not isinstance(dbapi_connection, sqlite3.Connection) and \
+            type(dbapi_connection).__name__ != 'AsyncAdapt_aiosqlite_connection':
+        return
+    cursor = dbapi_connection.cursor()
+    for name, value in SQLITE_PRAGMAS.items():
+        cursor.execute(f'PRAGMA {name}={value}')
+    cursor.close()
@@ -0,0 +1,218 @@
+# dlx.py
+"""
+Exact-cover Sudoku solver using Knuth's Algorithm X with Dancing Links.
+
+Sudoku maps to 324 constraint columns (cell filled, row/digit, column/digit,
+box/digit) and 729 candidate rows (one per cell/digit pair). The links are
+kept in flat lists rather than node objects, and the empty 9x9 matrix is
+built once and copied for every board.
+"""
+
+_CELL, _ROW, _COL, _BOX = 0, 81, 162, 243
+_NUM_COLUMNS = 324
+
+_template = None
+
+def _candidate_columns(r, c, d):
+    """Return the four constraint columns (1-based headers) covered by placing d at (r, c)."""
+    b = (r // 3) * 3 + c // 3
+    return (
+        1 + _CELL + r * 9 + c,
+        1 + _ROW + r * 9 + d - 1,
+        1 + _COL + c * 9 + d - 1,
+        1 + _BOX + b * 9 + d - 1,
+    )
+
+def _build_template():
+    """Build the link arrays for the empty board's exact-cover matrix."""
+    # Node 0 is the root, nodes 1..324 are column headers
+    size = 1 + _NUM_COLUMNS
+    left = [i - 1 for i in range(size)]
+    right = [i + 1 for i in range(size)]
+    left[0] = _NUM_COLUMNS
+    right[_NUM_COLUMNS] = 0
+    up = list(range(size))
+    down = list(range(size))
+    column = list(range(size))
+    count = [0] * size
+    candidate = [-1] * size
+
+    for r in range(9):
+        for c in range(9):
+            for d in range(1, 10):
+                cand = r * 81 + c * 9 + d - 1
+                first = len(left)
+                for k, col in enumerate(_candidate_columns(r, c, d)):
+                    node = first + k
+                    # Horizontal circular list of the candidate's four nodes
+                    left.append(first + (k - 1) % 4)
+                    right.append(first + (k + 1) % 4)
+                    # Insert at the bottom of the column
+                    up.append(up[col])
+                    down.append(col)
+                    down[up[col]] = node
+                    up[col] = node
+                    column.append(col)
+                    candidate.append(cand)
+                    count[col] += 1
+
+    return left, right, up, down, column, count, candidate
+
+class DancingLinks:
+    """
+    Exact-cover search state for a single board.
+    The givens are covered on construction; search methods restore the
+    links on the way out, so one instance can be counted and enumerated
+    more than once.
+    """
+
+    def __init__(self, board):
+        global _template
+        if _template is None:
+            _template = _build_template()
+        left, right, up, down, column, count, candidate = _template
+        self.left = left[:]
+        self.right = right[:]
+        self.up = up[:]
+        self.down = down[:]
+        self.column = column
+        self.count = count[:]
+        self.candidate = candidate
+        # Iterating rows works for lists of lists and sudoku_logic.Board alike
+        cells = [cell for row in board for cell in row]
+        self.givens = [cells[i:i + 9] for i in range(0, 81, 9)]
+        self.consistent = True
+
+        # Select the candidate row of every given, covering its columns
+        covered = set()
+        for i, d in enumerate(cells):
+            if d == 0:
+                continue
+            r, c = divmod(i, 9)
+            columns = _candidate_columns(r, c, d)
+            if covered.intersection(columns):
+                self.consistent = False  # Conflicting givens
+                return
+            covered.update(columns)
+            for col in columns:
+                self._cover(col)
+
+    def _cover(self, col):
+        left, right, up, down, column, count = (
+            self.left, self.right, self.up, self.down, self.column, self.count)
+        right[left[col]] = right[col]
+        left[right[col]] = left[col]
+        i = down[col]
+        while i != col:
+            j = right[i]
+            while j != i:
+                down[up[j]] = down[j]
+                up[down[j]] = up[j]
+                count[column[j]] -= 1
+                j = right[j]
+            i = down[i]
+
+    def _uncover(self, col):
+        left, right, up, down, column, count = (
+            self.left, self.right, self.up, self.down, self.column, self.count)
+        i = up[col]
+        while i != col:
+            j = left[i]
+            while j != i:
+                count[column[j]] += 1
+                down[up[j]] = j
+                up[down[j]] = j
+                j = left[j]
+            i = up[i]
+        right[left[col]] = col
+        left[right[col]] = col
+
+    def _choose_column(self):
+        """Return the uncovered column with the fewest remaining rows, or 0 if none remain."""
+        right, count = self.right, self.count
+        best = 0
+        best_count = 10
+        col = right[0]
+        while col != 0:
+            if count[col] < best_count:
+                best, best_count = col, count[col]
+                if best_count <= 1:
+                    break
+            col = right[col]
+        return best
+
+    def _search(self, limit, found):
+        col = self._choose_column()
+        if col == 0:
+            return found + 1
+        if self.count[col] == 0:
+            return found
+
+        right, left, down, column = self.right, self.left, self.down, self.column
+        self._cover(col)
+        i = down[col]
+        while i != col and found < limit:
+            j = right[i]
+            while j != i:
+                self._cover(column[j])
+                j = right[j]
+            found = self._search(limit, found)
+            j = left[i]
+            while j != i:
+                self._uncover(column[j])
+                j = left[j]
+            i = down[i]
+        self._uncover(col)
+        return found
+
+    def count_solutions(self, limit=2):
+        """Count solutions, stopping once the limit is reached."""
+        if not self.consistent:
+            return 0
+        return self._search(limit, 0)
+
+    def _iter(self, chosen):
+        col = self._choose_column()
+        if col == 0:
+            yield list(chosen)
+            return
+        if self.count[col] == 0:
+            return
+
+        right, left, down, column = self.right, self.left, self.down, self.column
+        self._cover(col)
+        i = down[col]
+        while i != col:
+            chosen.append(self.candidate[i])
+            j = right[i]
+            while j != i:
+                self._cover(column[j])
+                j = right[j]
+            yield from self._iter(chosen)
+            j = left[i]
+            while j != i:
+                self._uncover(column[j])
+                j = left[j]
+            chosen.pop()
+            i = down[i]
+        self._uncover(col)
+
+    def solutions(self):
+        """Lazily yield every solution as a new list-of-lists board."""
+        if not self.consistent:
+            return
+        for chosen in self._iter([]):
+            board = [row[:] for row in self.givens]
+            for cand in chosen:
+                r, rest = divmod(cand, 81)
+                c, d = divmod(rest, 9)
+                board[r][c] = d + 1
+            yield board
+
+def count_solutions(board, limit=2):
+    """Count the number of solutions a board has, up to the limit"""
+    return DancingLinks(board).count_solutions(limit)
+
+def iter_solutions(board):
+    """Lazily yield each solution of the board. The input is not modified."""
+    return DancingLinks(board).solutions()
@@ -1,20 +1,28 @@
 # frontend.py
 import tkinter as tk
 from tkinter import messagebox, simpledialog, Toplevel, ttk
-import requests
-import json
 import sys
-from sudoku_logic import generate_board, solve, board_to_string, string_to_board, is_valid_board, count_solutions
-import copy
+from sudoku_logic import generate_puzzle, board_to_string, string_to_board, is_valid_board, get_solution
+from puzzle_pool import PuzzlePool
+from save_queue import SaveWorker, SaveRejected
+from client import SudokuClient, API_URL
 
-API_URL = "http://localhost:5000"
+# Ready puzzles kept per difficulty; refilled in the background when a
+# pool drops below the low watermark, up to the high watermark.
+PUZZLE_POOL_LOW_WATERMARK = 1
+PUZZLE_POOL_HIGH_WATERMARK = 3
 
-def check_backend_connection():
-    try:
-        requests.get(API_URL, timeout=2)
-        return True
-    except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
-        return False
+# Rows requested for the leaderboard window
+LEADERBOARD_SIZE = 15
+
+# Seconds to wait for queued saves to be sent before reading the saved game, and on exit
+SAVE_WAIT_TIMEOUT = 10
+SAVE_FLUSH_TIMEOUT = 5
+# Milliseconds between checks for finished background requests and saves
+POLL_INTERVAL = 100
+
+class SaveConflict(SaveRejected):
+    """The game on the server changed since the version a save was based on."""
 
 class SudokuGUI:
     def __init__(self, root):
@@ -45,7 +53,13 @@ class SudokuGUI:
         self.user_id = None
         self.board = None
         self.original_board = None  # Store the original board state
+        self.solution = None  # Solution of original_board, when known
         self.entries = []
+        self.cell_vars = []  # StringVar behind each entry; writes mark the cell dirty
+        self.dirty_cells = set()  # (row, col) changed since the last successful save
+        self.game_version = None  # Server version of the saved game, for delta saves
+        self.game_token = 0  # Changes whenever a different game is shown; tags queued saves
+        self._saved_version = (None, None)  # (game_token, version) of the last save sent; save worker only
         self.current_focus = None  # Track current selected cell
         self.hints_used = 0  # Track hints used in current game
         self.solved_by_algorithm = False  # Track if solve button was used
@@ -54,12 +68,28 @@ class SudokuGUI:
         self.timer_running = False
         self.time_expired = False
         
+        # All requests to the backend go through one pooled client
+        self.client = SudokuClient(API_URL)
+        
         # Check backend connection before proceeding
-        if not check_backend_connection():
+        if not self.client.is_available():
             messagebox.showerror("Connection Error", 
                                 "Cannot connect to the backend server. Please restart the application.")
             root.after(1000, root.destroy)
             return
+        
+        # Fetch puzzles in the background so "New Game" is instant; if none is
+        # ready, one is generated locally rather than fetched on the Tk thread
+        self.puzzle_pool = PuzzlePool(PUZZLE_POOL_LOW_WATERMARK, PUZZLE_POOL_HIGH_WATERMARK,
+                                      generator=self.fetch_puzzle,
+                                      fallback=self.generate_playable_board)
+        self.puzzle_pool.start()
+        
+        # Send saves in the background, in order, with bursts coalesced
+        self.save_worker = SaveWorker(self._send_save, on_result=self._on_save_result,
+                                      merge=merge_saves)
+        self.save_worker.start()
+        self.poll_background()
             
         self.create_login_screen()
 
@@ -124,19 +154,21 @@ class SudokuGUI:
         if not username or not password:
             messagebox.showerror("Error", "Please enter both username and password.")
             return
-        try:
-            response = requests.post(f"{API_URL}/login", json={"username": username, "password": password})
-            if response.status_code == 200:
-                data = response.json()
-                self.user_id = data["user_id"]
-                # Load user statistics from login response
-                if "stats" in data:
-                    self.user_stats = data["stats"]
-                self.create_home_screen()  # Go to home screen instead of game screen
-            else:
-                messagebox.showerror("Login Failed", response.json().get("message", "Error logging in"))
-        except Exception as e:
-            messagebox.showerror("Error", f"Could not connect to backend. {e}")
+        self.client.run(self.client.login, username, password, callback=self._on_login)
+
+    def _on_login(self, result, error):
+        if error is not None:
+            messagebox.showerror("Error", f"Could not connect to backend. {error}")
+            return
+        status, data = result
+        if status == 200:
+            self.user_id = data["user_id"]
+            # Load user statistics from login response
+            if "stats" in data:
+                self.user_stats = data["stats"]
+            self.create_home_screen()  # Go to home screen instead of game screen
+        else:
+            messagebox.showerror("Login Failed", data.get("message", "Error logging in"))
 
     def register(self):
         username = self.username_entry.get().strip()
@@ -147,14 +179,17 @@ class SudokuGUI:
         if len(password) < 6:
             messagebox.showerror("Error", "Password must be at least 6 characters long.")
             return
-        try:
-            response = requests.post(f"{API_URL}/register", json={"username": username, "password": password})
-            if response.status_code == 200:
-                messagebox.showinfo("Success", "Registration successful! Please login.")
-            else:
-                messagebox.showerror("Error", response.json().get("message", "Registration failed"))
-        except Exception as e:
-            messagebox.showerror("Error", f"Could not connect to backend. {e}")
+        self.client.run(self.client.register, username, password, callback=self._on_register)
+
+    def _on_register(self, result, error):
+        if error is not None:
+            messagebox.showerror("Error", f"Could not connect to backend. {error}")
+            return
+        status, data = result
+        if status == 200:
+            messagebox.showinfo("Success", "Registration successful! Please login.")
+        else:
+            messagebox.showerror("Error", data.get("message", "Registration failed"))
 
     def create_home_screen(self):
         """Create a home screen with game options"""
@@ -225,9 +260,10 @@ class SudokuGUI:
         )
         leaderboard_btn.pack(pady=15)
         
-        # Load last game button (if exists)
-        last_game_exists = self.check_saved_game_exists()
-        if last_game_exists:
+        # Load last game button (if exists), added once the backend has answered
+        def add_continue_button(last_game_exists, error):
+            if not last_game_exists or not buttons_frame.winfo_exists():
+                return
             continue_btn = tk.Button(
                 buttons_frame,
                 text="Continue Game",
@@ -241,11 +277,14 @@ class SudokuGUI:
             )
             continue_btn.pack(pady=15)
             
+        self.client.run(self.check_saved_game_exists, callback=add_continue_button)
+            
     def check_saved_game_exists(self):
-        """Check if a saved game exists for the current user"""
+        """Check if a saved game exists for the current user. Blocks; call through self.client.run()"""
         try:
-            response = requests.get(f"{API_URL}/load_game/{self.user_id}")
-            return response.status_code == 200 and "board_state" in response.json()
+            self.save_worker.flush(SAVE_WAIT_TIMEOUT)  # Saves still queued may create or delete it
+            # HEAD on the metadata route: no boards are sent or decoded
+            return self.client.game_exists(self.user_id)
         except:
             return False
     
@@ -352,57 +391,40 @@ class SudokuGUI:
             self.create_game_screen(True)
             
     def create_game_screen(self, new_game=False, continue_game=False):
+        """
+        Show the game screen: for a new game (new_game), for the saved game
+        (continue_game; it is loaded in the background first), or else for
+        the game already in self.board.
+        """
+        if continue_game:
+            self.stop_timer()
+            self.show_busy("Loading game...")
+            user_id = self.user_id
+            self.client.run(self.load_saved_game, user_id,
+                            callback=lambda game, error: self._on_game_loaded(user_id, game, error))
+            return
+        
         self.clear_root()
         self.root.configure(bg="#EBF5FB")  # Apply background
         
-        # If continuing a game, force load saved game
-        if continue_game:
-            loaded_game = self.load_saved_game()
-            if loaded_game:
-                self.board = loaded_game["board_state"]
-                self.original_board = loaded_game["original_board"]
-                self.hints_used = loaded_game.get("hints_used", 0)
-                self.solved_by_algorithm = loaded_game.get("solved_by_algorithm", False)
-                self.time_remaining = loaded_game.get("time_remaining", 30 * 60)
-                self.time_expired = loaded_game.get("time_expired", False)
-            else:
-                # If somehow we can't load the game, go back to the home screen
-                messagebox.showerror("Error", "Could not load the saved game.")
-                self.create_home_screen()
-                return
-        # If starting a new game or no saved game exists (and not explicitly continuing)
-        elif new_game or not self.load_saved_game():
-            # Generate a new board with the selected difficulty
+        # If starting a new game, take a fresh board
+        if new_game:
+            # Take a pre-generated board with the selected difficulty
             if hasattr(self, 'selected_difficulty'):
-                self.board = self.generate_playable_board(self.selected_difficulty)
+                self.board, self.solution = self.puzzle_pool.pop(self.selected_difficulty)
             else:
-                self.board = self.generate_playable_board("medium")  # Default difficulty
+                self.board, self.solution = self.puzzle_pool.pop("medium")  # Default difficulty
+            self.game_token += 1
                 
             self.original_board = [[cell for cell in row] for row in self.board]
             self.hints_used = 0
             self.solved_by_algorithm = False
             self.time_remaining = 30 * 60  # Reset timer to 30 minutes
             self.time_expired = False
-        
-            # Save new game with is_new_game flag if it's a new game (not initial load)
-            if new_game:
-                try:
-                    requests.post(f"{API_URL}/save_game", json={
-                        "user_id": self.user_id,
-                        "board_state": json.dumps(self.board),
-                        "original_board": json.dumps(self.original_board),
-                        "completed": False,
-                        "hints_used": 0,
-                        "solved_by_algorithm": False,
-                        "time_remaining": self.time_remaining,
-                        "time_expired": self.time_expired,
-                        "is_new_game": True
-                    })
-                    
-                    # Update the local counter for display
-                    self.user_stats['puzzles_played'] += 1
-                except Exception as e:
-                    messagebox.showerror("Error", f"Could not create new game: {e}")
+            self.game_version = None  # Not saved yet
+            
+            # Save new game with is_new_game flag
+            self.queue_new_game()
         
         # Main container frame with cleaner design
         main_container = tk.Frame(self.root, bg="#EBF5FB", padx=15, pady=15)
@@ -462,12 +484,14 @@ class SudokuGUI:
         
         # Sudoku board grid with nicer styling
         self.entries = []
+        self.cell_vars = []
         board_frame = tk.Frame(main_container, bg=self.colors["cell_border"], bd=3, relief="solid")
         board_frame.pack(pady=15, padx=15)
         
         # Create the Sudoku grid with better cell styling
         for i in range(9):
             row_entries = []
+            row_vars = []
             for j in range(9):
                 # Add thicker borders for 3x3 box separation
                 border_thickness = 1
@@ -476,8 +500,9 @@ class SudokuGUI:
                 if j % 3 == 0 and j > 0:
                     border_thickness = 3
                 
+                var = tk.StringVar()
                 e = tk.Entry(board_frame, width=2, font=("Helvetica", 22, "bold"), justify="center", 
-                           bd=border_thickness, relief="ridge")
+                           bd=border_thickness, relief="ridge", textvariable=var)
                 e.grid(row=i, column=j, padx=0, pady=0)
                 
                 # Set focus tracking for hint feature with visual feedback
@@ -496,8 +521,16 @@ class SudokuGUI:
                 else:
                     e.config(bg=self.colors["white"])  # White background for empty cells
                 
+                # Any change to the cell, typed or programmatic, marks it for the next save
+                var.trace_add("write", lambda *args, row=i, col=j: self.dirty_cells.add((row, col)))
+                
                 row_entries.append(e)
+                row_vars.append(var)
             self.entries.append(row_entries)
+            self.cell_vars.append(row_vars)
+        
+        # The board as populated matches the saved game
+        self.dirty_cells.clear()
             
         # Buttons below the puzzle in a stylish container
         btn_container = tk.Frame(main_container, bg="#EBF5FB")
@@ -564,47 +597,44 @@ class SudokuGUI:
         if self.original_board[row][col] == 0:
             self.entries[row][col].config(bg=self.colors["cell_selected"])
             
+    def fetch_puzzle(self, difficulty="medium"):
+        """
+        Take a puzzle from the server's puzzle bank, or generate one locally
+        if the server cannot provide it. Returns (board, solution).
+        Runs on the puzzle pool's worker thread, so it must not touch Tk.
+        """
+        try:
+            status, data = self.client.next_puzzle(difficulty)
+            if status == 200:
+                return string_to_board(data["givens"]), string_to_board(data["solution"])
+        except Exception:
+            pass  # Server unreachable or returned something unusable
+        return self.generate_playable_board(difficulty)
+
     def generate_playable_board(self, difficulty="medium"):
-        """Generate a board with a guaranteed single solution"""
-        # We'll use the improved generate_board function from sudoku_logic
-        # The improved function already ensures a valid board with a single solution
-        
-        # Generate board using the improved function in sudoku_logic.py
-        board = None
-        max_attempts = 3
-        attempt = 0
-        
-        while attempt < max_attempts:
-            try:
-                board = generate_board(difficulty=difficulty)
-                # Verify the board has exactly one solution and is valid
-                board_copy = copy.deepcopy(board)
-                if solve(board_copy) and count_solutions(board) == 1:
-                    return board
-            except Exception:
-                pass  # Try again if any error occurs
-            attempt += 1
-            
-        # If we had trouble generating a board, try with 'easy' difficulty as fallback
-        return generate_board(difficulty='easy')
+        """
+        Generate a board with a guaranteed single solution.
+        Returns (board, solution).
+        Runs on the puzzle pool's worker thread, or on the Tk thread when the
+        pool is empty, so it must not touch Tk.
+        """
+        return generate_puzzle(difficulty=difficulty)
 
     def new_game(self):
         """Create a new game board and update the UI"""
-        # Delete current game from the backend
-        try:
-            if self.user_id:
-                requests.delete(f"{API_URL}/delete_game/{self.user_id}")
-        except Exception:
-            pass  # Ignore errors here
+        # Delete current game from the backend, after any saves still queued for it
+        if self.user_id:
+            self.save_worker.submit({"action": "delete", "user_id": self.user_id})
         
         # Stop the current timer if running
         self.stop_timer()
         
-        # Generate a new board and refresh the UI
+        # Take a pre-generated board and refresh the UI
         if hasattr(self, 'selected_difficulty'):
-            self.board = self.generate_playable_board(self.selected_difficulty)
+            self.board, self.solution = self.puzzle_pool.pop(self.selected_difficulty)
         else:
-            self.board = self.generate_playable_board("medium")  # Default to medium if no selection
+            self.board, self.solution = self.puzzle_pool.pop("medium")  # Default to medium if no selection
+        self.game_token += 1
         
         self.original_board = [[cell for cell in row] for row in self.board]
         self.hints_used = 0
@@ -613,23 +643,8 @@ class SudokuGUI:
         self.time_expired = False
     
         # Save the new game with is_new_game flag set to True to increment the counter
-        try:
-            requests.post(f"{API_URL}/save_game", json={
-                "user_id": self.user_id,
-                "board_state": json.dumps(self.board),
-                "original_board": json.dumps(self.original_board),
-                "completed": False,
-                "hints_used": 0,
-                "solved_by_algorithm": False,
-                "time_remaining": self.time_remaining,
-                "time_expired": self.time_expired,
-                "is_new_game": True
-            })
-            
-            # Update the local counter for display
-            self.user_stats['puzzles_played'] += 1
-        except Exception as e:
-            messagebox.showerror("Error", f"Could not create new game: {e}")
+        self.game_version = None
+        self.queue_new_game()
         
         self.create_game_screen()
 
@@ -647,62 +662,202 @@ class SudokuGUI:
             # Don't reset hints_used counter as those have already been counted
             self.save_game()
 
-    def load_saved_game(self):
-        try:
-            response = requests.get(f"{API_URL}/load_game/{self.user_id}")
-            if response.status_code == 200:
-                data = response.json()
-                if "board_state" in data and "original_board" in data:
-                    result = {
-                        "board_state": json.loads(data["board_state"]),
-                        "original_board": json.loads(data["original_board"]),
-                        "hints_used": data.get("hints_used", 0),
-                        "solved_by_algorithm": data.get("solved_by_algorithm", False),
-                        "time_remaining": data.get("time_remaining", 30 * 60),
-                        "time_expired": data.get("time_expired", False)
-                    }
-                    return result
-            return None
-        except Exception as e:
-            messagebox.showerror("Error", f"Could not load saved game. {e}")
+    def load_saved_game(self, user_id):
+        """
+        Fetch the user's saved game, after any saves still queued for it.
+        Returns it as a dict, or None if there is none.
+        Blocks; call through self.client.run(), since it must not touch Tk.
+        """
+        self.save_worker.flush(SAVE_WAIT_TIMEOUT)  # Load what was last saved
+        status, data = self.client.load_game(user_id)
+        if status != 200 or "board_state" not in data or "original_board" not in data:
             return None
+        return {
+            "board_state": string_to_board(data["board_state"]),
+            "original_board": string_to_board(data["original_board"]),
+            "solution": string_to_board(data["solution"]) if data.get("solution") else None,
+            "hints_used": data.get("hints_used", 0),
+            "solved_by_algorithm": data.get("solved_by_algorithm", False),
+            "version": data.get("version"),
+            "time_remaining": data.get("time_remaining", 30 * 60),
+            "time_expired": data.get("time_expired", False)
+        }
+
+    def _on_game_loaded(self, user_id, loaded_game, error):
+        """Tk thread: the saved game requested by create_game_screen(continue_game=True) arrived"""
+        if user_id != self.user_id:
+            return  # Logged out meanwhile
+        if error is not None or not loaded_game:
+            # If somehow we can't load the game, go back to the home screen
+            detail = f" {error}" if error is not None else ""
+            messagebox.showerror("Error", f"Could not load the saved game.{detail}")
+            self.create_home_screen()
+            return
+        self.board = loaded_game["board_state"]
+        self.game_token += 1
+        self.original_board = loaded_game["original_board"]
+        self.solution = loaded_game["solution"]
+        self.game_version = loaded_game.get("version")
+        self.hints_used = loaded_game.get("hints_used", 0)
+        self.solved_by_algorithm = loaded_game.get("solved_by_algorithm", False)
+        self.time_remaining = loaded_game.get("time_remaining", 30 * 60)
+        self.time_expired = loaded_game.get("time_expired", False)
+        self.create_game_screen()
+
+    def show_busy(self, text):
+        """Replace the screen with a message while a background request completes"""
+        self.clear_root()
+        self.root.configure(bg="#EBF5FB")
+        tk.Label(self.root, text=text, font=("Helvetica", 16),
+                 bg="#EBF5FB", fg=self.colors["dark"]).pack(expand=True)
+
+    def cell_value(self, row, col):
+        """Digit in an entry, 0 if it is empty or not a digit"""
+        entry_value = self.entries[row][col].get()
+        try:
+            val = int(entry_value) if entry_value else 0
+            if val < 0 or val > 9:
+                val = 0
+        except ValueError:
+            val = 0
+        return val
+
+    def queue_new_game(self):
+        """Queue the creation of the current (new) game on the backend"""
+        self.save_worker.submit({
+            "action": "save",
+            "game": self.game_token,
+            "user_id": self.user_id,
+            "board_state": board_to_string(self.board),
+            "original_board": board_to_string(self.original_board),
+            "solution": board_to_string(self.solution) if self.solution else None,
+            "completed": False,
+            "hints_used": 0,
+            "solved_by_algorithm": False,
+            "time_remaining": self.time_remaining,
+            "time_expired": self.time_expired,
+            "is_new_game": True,
+            "patches": {},
+            "version": None
+        })
+        # Update the local counter for display
+        self.user_stats['puzzles_played'] += 1
 
     def save_game(self, completed=False):
+        """
+        Queue a save of the current game. The board is read on the Tk thread
+        (only the dirty cells); the request is sent by the save worker.
+        """
         if self.user_id is None or self.board is None:
             return
         
-        # Update board from entry fields
-        current_board = []
-        for i in range(9):
-            row = []
-            for j in range(9):
-                entry_value = self.entries[i][j].get()
-                try:
-                    val = int(entry_value) if entry_value else 0
-                    if val < 0 or val > 9:
-                        val = 0
-                except ValueError:
-                    val = 0
-                row.append(val)
-            current_board.append(row)
+        # Unfinished games already on the server only need their changed cells
+        if not completed and self.game_version is not None and not self.dirty_cells:
+            return
         
-        try:
-            response = requests.post(f"{API_URL}/save_game", json={
-                "user_id": self.user_id,
-                "board_state": json.dumps(current_board),
-                "original_board": json.dumps(self.original_board),
-                "completed": completed,
-                "hints_used": self.hints_used,
-                "solved_by_algorithm": self.solved_by_algorithm,
-                "time_remaining": self.time_remaining,
-                "time_expired": self.time_expired
+        # self.board mirrors the entries as of the last save; bring the dirty cells up to date
+        patches = {}
+        for i, j in self.dirty_cells:
+            patches[(i, j)] = self.board[i][j] = self.cell_value(i, j)
+        self.dirty_cells.clear()
+        
+        self.save_worker.submit({
+            "action": "save",
+            "game": self.game_token,
+            "user_id": self.user_id,
+            "board_state": board_to_string(self.board),
+            "original_board": board_to_string(self.original_board),
+            "solution": board_to_string(self.solution) if self.solution else None,
+            "completed": completed,
+            "hints_used": self.hints_used,
+            "solved_by_algorithm": self.solved_by_algorithm,
+            "time_remaining": self.time_remaining,
+            "time_expired": self.time_expired,
+            "patches": patches,
+            "version": self.game_version
+        }, key=("save", self.game_token))
+
+    def _send_save(self, payload):
+        """
+        Save worker: send one queued payload. Unfinished games with a known
+        version are sent as a delta; otherwise, or if the delta is rejected,
+        the whole board is sent. Returns the game's new version.
+        """
+        if payload["action"] == "delete":
+            self.client.delete_game(payload["user_id"])
+            return None  # 404 (nothing to delete) is fine
+        
+        version = payload["version"]
+        if self._saved_version[0] == payload["game"]:
+            version = self._saved_version[1]  # Newer than the version the Tk thread knew
+        
+        if not payload["completed"] and version is not None and not payload.get("is_new_game"):
+            if not payload["patches"]:
+                return version
+            status, data = self.client.save_game_delta({
+                "user_id": payload["user_id"],
+                "version": version,
+                "patches": [[i, j, value] for (i, j), value in sorted(payload["patches"].items())],
+                "hints_used": payload["hints_used"],
+                "solved_by_algorithm": payload["solved_by_algorithm"]
             })
-            
-            if response.status_code != 200:
-                messagebox.showerror("Error", f"Failed to save game: {response.json().get('message', 'Unknown error')}")
-                
-        except Exception as e:
-            messagebox.showerror("Error", f"Could not save game. {e}")
+            if status == 200:
+                version = data.get("version")
+                self._saved_version = (payload["game"], version)
+                return version
+            if status == 409:
+                raise SaveConflict(data.get('message', 'Saved game has changed'))
+            # No saved game: fall back to a full save
+        
+        body = {key: value for key, value in payload.items()
+                if key not in ("action", "game", "patches", "version")}
+        if version is not None:
+            body["version"] = version  # Refused with 409 if the server's game has moved on
+        status, data = self.client.save_game(body)
+        if status == 409 and "version" in data:
+            raise SaveConflict(data.get('message', 'Saved game has changed'))
+        if status >= 500 or status == 409:
+            raise RuntimeError(data.get('message', 'Unknown error'))  # Retried
+        if status != 200:
+            raise SaveRejected(data.get('message', 'Unknown error'))
+        version = data.get("version")
+        self._saved_version = (payload["game"], version)
+        return version
+
+    def poll_background(self):
+        """Deliver results of background requests and saves on the Tk thread"""
+        self.client.poll()
+        self.save_worker.poll()
+        self.root.after(POLL_INTERVAL, self.poll_background)
+
+    def _on_save_result(self, payload, version, error):
+        """Tk thread: a queued save finished"""
+        if payload["action"] != "save" or payload["game"] != self.game_token or self.user_id is None:
+            return  # Deletes, and saves of a game no longer shown
+        if isinstance(error, SaveConflict):
+            messagebox.showwarning("Game Changed",
+                                   "This game was changed elsewhere since it was loaded. "
+                                   "Your latest moves were not saved; the saved game will be loaded.")
+            self.create_game_screen(continue_game=True)
+            return
+        if error is not None:
+            # Send these cells again with the next save
+            self.dirty_cells.update(payload["patches"])
+            if payload.get("is_new_game"):
+                messagebox.showerror("Error", f"Could not create new game: {error}")
+            else:
+                messagebox.showerror("Error", f"Could not save game. {error}")
+            return
+        self.game_version = version
+
+    def current_solution(self):
+        """
+        Solution of the current puzzle. Games saved before solutions were
+        stored have none, so it is solved once and sent with the next save.
+        """
+        if self.solution is None:
+            self.solution = get_solution(self.original_board)
+        return self.solution
 
     def hint(self):
         # Check if hints limit reached
@@ -713,9 +868,9 @@ class SudokuGUI:
         self.hints_used += 1
         self.hints_label.config(text=f"Hints Used: {self.hints_used}/2")
         
-        # Create a clean copy of the original board for solving
-        solution_board = copy.deepcopy(self.original_board)
-        if solve(solution_board):
+        # Use the known solution of the original board
+        solution_board = self.current_solution()
+        if solution_board is not None:
             # If a cell is focused, provide hint for that specific cell
             if self.current_focus:
                 row, col = self.current_focus
@@ -809,10 +964,10 @@ class SudokuGUI:
         # Mark that the solve algorithm was used
         self.solved_by_algorithm = True
         
-        # Create a solution based on the original board
-        solution_board = copy.deepcopy(self.original_board)
+        # Use the known solution of the original board
+        solution_board = self.current_solution()
         
-        if solve(solution_board):
+        if solution_board is not None:
             # Update the board with the solution, replacing all user inputs
             for i in range(9):
                 for j in range(9):
@@ -827,11 +982,18 @@ class SudokuGUI:
             messagebox.showerror("Error", "No solution exists for this puzzle. Please try a different puzzle.")
 
     def show_leaderboard(self):
-        """Display leaderboard in a new window"""
+        """Display leaderboard in a new window once it has been fetched"""
+        self.client.run(self.client.leaderboard, LEADERBOARD_SIZE, self.user_id,
+                        callback=self._on_leaderboard)
+
+    def _on_leaderboard(self, result, error):
         try:
-            response = requests.get(f"{API_URL}/leaderboard")
-            if response.status_code == 200:
-                leaderboard_data = response.json().get("leaderboard", [])
+            if error is not None:
+                raise error
+            status, data = result
+            if status == 200:
+                leaderboard_data = data.get("leaderboard", [])
+                my_row = data.get("me")
                 
                 # Create a new window for the leaderboard
                 lb_window = Toplevel(self.root)
@@ -859,10 +1021,12 @@ class SudokuGUI:
                 scrollbar.pack(side="right", fill="y")
                 tree.pack(expand=True, fill="both", padx=10, pady=10)
                 
-                # Populate data
-                for i, user in enumerate(leaderboard_data):
+                # Populate data, adding the current user's row if they are outside the top list
+                if my_row and all(user["rank"] != my_row["rank"] for user in leaderboard_data):
+                    leaderboard_data = leaderboard_data + [my_row]
+                for user in leaderboard_data:
                     tree.insert("", "end", values=(
-                        i + 1,
+                        user["rank"],
                         user["username"],
                         user["puzzles_played"],
                         user["puzzles_solved"],
@@ -883,11 +1047,21 @@ class SudokuGUI:
         self.stop_timer()  # Stop the timer when logging out
         self.user_id = None
         self.board = None
+        self.show_busy("Logging out...")
+        # Queued saves still need the session token; drop it once they are sent
+        self.client.run(self.save_worker.flush, SAVE_WAIT_TIMEOUT, callback=self._on_logged_out)
+
+    def _on_logged_out(self, flushed, error):
+        """Tk thread: saves queued before logout were sent (or timed out)"""
+        self.client.set_token(None)
         self.create_login_screen()
 
     def on_close(self):
         self.save_game()
         self.stop_timer()  # Stop the timer when closing the app
+        self.save_worker.stop(timeout=SAVE_FLUSH_TIMEOUT)  # Send queued saves before exiting
+        self.client.close()
+        self.puzzle_pool.stop(timeout=1)
         self.root.destroy()
 
     def format_time(self, seconds):
@@ -928,6 +1102,18 @@ class SudokuGUI:
                 # Schedule the next update after 1 second
                 self.root.after(1000, self.update_timer)
 
+def merge_saves(old, new):
+    """
+    Combine two queued saves of the same game: the newer state, with the
+    older save's patches and base version so the cells it changed are
+    still sent.
+    """
+    merged = dict(new)
+    merged["patches"] = {**old["patches"], **new["patches"]}
+    merged["version"] = old["version"]
+    merged["completed"] = old["completed"] or new["completed"]
+    return merged
+
 def run_frontend():
     root = tk.Tk()
     app = SudokuGUI(root)
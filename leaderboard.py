@@ -0,0 +1,125 @@
+# leaderboard.py
+import base64
+import threading
+from bisect import bisect_left, bisect_right, insort
+from sqlalchemy import select
+from database import db, User
+
+class Leaderboard:
+    """
+    Materialized ranking of all users, kept in memory and updated in place.
+
+    Users are ordered by win percentage, then puzzles solved (both
+    descending), then user id. The ranking is read from the database once,
+    using the (win_percentage, puzzles_solved) index, and afterwards each
+    stats change only moves that user's entry, so top-N and rank queries
+    never scan the users table.
+    """
+
+    def __init__(self):
+        self._keys = []      # Sorted (-win_percentage, -puzzles_solved, user_id)
+        self._entries = {}   # user_id -> (key, username, puzzles_played, puzzles_solved, win_percentage)
+        self._loaded = False
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def _key(user_id, puzzles_solved, win_percentage):
+        return (-(win_percentage or 0.0), -(puzzles_solved or 0), user_id)
+
+    @property
+    def loaded(self):
+        return self._loaded
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        self.load(db.session.execute(ranking_select()).all())
+
+    def load(self, rows):
+        """
+        Replace the ranking with the rows of ranking_select(), for callers
+        that run the query themselves (see async_backend.py).
+        """
+        with self._lock:
+            self._keys = []
+            self._entries = {}
+            for user_id, username, played, solved, win in rows:
+                key = self._key(user_id, solved, win)
+                self._keys.append(key)
+                self._entries[user_id] = (key, username, played or 0, solved or 0, win or 0.0)
+            self._keys.sort()  # Already ordered by the query; also normalizes NULL stats
+            self._loaded = True
+
+    def update(self, user):
+        """Insert or move a user after their stats changed. Call after the change is committed."""
+        with self._lock:
+            if not self._loaded:
+                return  # The next load reads the committed stats
+            self._discard(user.id)
+            key = self._key(user.id, user.puzzles_solved, user.win_percentage)
+            insort(self._keys, key)
+            self._entries[user.id] = (key, user.username, user.puzzles_played or 0,
+                                      user.puzzles_solved or 0, user.win_percentage or 0.0)
+
+    def _discard(self, user_id):
+        entry = self._entries.pop(user_id, None)
+        if entry is not None:
+            index = bisect_left(self._keys, entry[0])
+            del self._keys[index]
+
+    def _row(self, index):
+        key = self._keys[index]
+        _, username, played, solved, win = self._entries[key[2]]
+        return {
+            "rank": index + 1,
+            "username": username,
+            "puzzles_played": played,
+            "puzzles_solved": solved,
+            "win_percentage": round(win, 2)
+        }
+
+    def page(self, limit, offset=0, cursor=None):
+        """
+        Return (rows, next_cursor, total) for one page of the ranking.
+        With a cursor (from a previous page) the page starts right after the
+        last row of that page, so rows do not shift or repeat as ranks change
+        between requests; otherwise it starts at offset.
+        """
+        with self._lock:
+            self._ensure_loaded()
+            start = bisect_right(self._keys, decode_cursor(cursor)) if cursor else offset
+            end = min(start + limit, len(self._keys))
+            rows = [self._row(i) for i in range(start, end)]
+            next_cursor = encode_cursor(self._keys[end - 1]) if end < len(self._keys) and rows else None
+            return rows, next_cursor, len(self._keys)
+
+    def rank(self, user_id):
+        """Return the user's leaderboard row (including "rank"), or None if unknown."""
+        with self._lock:
+            self._ensure_loaded()
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            return self._row(bisect_left(self._keys, entry[0]))
+
+def ranking_select():
+    """Every user's ranking columns in rank order, using the (win_percentage, puzzles_solved) index."""
+    users = User.__table__
+    return select(users.c.id, users.c.username, users.c.puzzles_played,
+                  users.c.puzzles_solved, users.c.win_percentage) \
+        .order_by(users.c.win_percentage.desc(), users.c.puzzles_solved.desc(), users.c.id)
+
+def encode_cursor(key):
+    raw = f"{-key[0]!r}:{-key[1]}:{key[2]}".encode("ascii")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+def decode_cursor(cursor):
+    """Decode a page cursor back to a sort key. Raises ValueError if malformed."""
+    try:
+        win, solved, user_id = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("ascii").split(":")
+        return (-float(win), -int(solved), int(user_id))
+    except (ValueError, UnicodeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+# Shared by the backend routes
+leaderboard = Leaderboard()
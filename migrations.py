@@ -0,0 +1,110 @@
+# migrations.py
+"""
+Schema upgrades for existing databases.
+
+db.create_all() creates missing tables but never alters existing ones, so
+columns and indexes added to the models after a database was created are
+applied here. Every step inspects the live schema first and is safe to run
+more than once.
+
+    python migrations.py
+"""
+from datetime import datetime
+from sqlalchemy import inspect, literal, select, text
+from database import User, Game, ArchivedGame, Puzzle
+
+def _columns(conn, table):
+    return {column['name'] for column in inspect(conn).get_columns(table)}
+
+def _create_missing_indexes(conn, model):
+    table = model.__table__
+    existing = {index['name'] for index in inspect(conn).get_indexes(table.name)}
+    for index in table.indexes:
+        if index.name not in existing:
+            index.create(conn)
+
+def add_game_solution(conn):
+    """games.solution: the puzzle's solution in compact form (nullable)."""
+    if 'solution' not in _columns(conn, 'games'):
+        conn.execute(text("ALTER TABLE games ADD COLUMN solution TEXT"))
+
+def add_game_version(conn):
+    """games.version: save counter used for optimistic concurrency."""
+    if 'version' not in _columns(conn, 'games'):
+        conn.execute(text("ALTER TABLE games ADD COLUMN version INTEGER NOT NULL DEFAULT 0"))
+
+def archive_duplicate_active_games(conn):
+    """
+    Leave one unfinished game per user, so the one-active-game unique index
+    can be built. The kept game is the lowest id, the one the original
+    unordered .first() lookup returned. The others move to archived_games
+    rather than being deleted, so no saved board is lost. They are not
+    marked completed: save_game counts a user's new game as played only
+    while the user has no completed game, and /games/bulk reads completed
+    as finished.
+    """
+    games = Game.__table__
+    archived = ArchivedGame.__table__
+    archived.create(conn, checkfirst=True)
+    _create_missing_indexes(conn, ArchivedGame)
+    rows = conn.execute(
+        select(games.c.id, games.c.user_id)
+        .where(games.c.completed == False)
+        .order_by(games.c.user_id, games.c.id)
+    )
+    duplicates = []
+    last_user = None
+    for game_id, user_id in rows:
+        if user_id == last_user:
+            duplicates.append(game_id)
+        last_user = user_id
+    if duplicates:
+        columns = [archived.c[name] for name in archived.c.keys() if name != 'archived_at']
+        conn.execute(archived.insert().from_select(
+            columns + [archived.c.archived_at],
+            select(*[games.c[column.name] for column in columns], literal(datetime.utcnow()))
+            .where(games.c.id.in_(duplicates))
+        ))
+        conn.execute(games.delete().where(games.c.id.in_(duplicates)))
+
+def add_game_indexes(conn):
+    """Indexes declared on Game: the active-game lookup and one active game per user."""
+    _create_missing_indexes(conn, Game)
+
+def drop_superseded_indexes(conn):
+    """ix_games_user_completed_updated is a prefix of ix_games_user_meta."""
+    conn.execute(text("DROP INDEX IF EXISTS ix_games_user_completed_updated"))
+
+def add_user_indexes(conn):
+    """Indexes declared on User: the leaderboard ordering."""
+    _create_missing_indexes(conn, User)
+
+def add_puzzle_bank(conn):
+    """puzzle_bank table and its unserved-puzzle index, for databases made before the bank."""
+    Puzzle.__table__.create(conn, checkfirst=True)
+    _create_missing_indexes(conn, Puzzle)
+
+# Applied in order by upgrade()
+STEPS = [
+    add_game_solution,
+    add_game_version,
+    archive_duplicate_active_games,
+    add_game_indexes,
+    drop_superseded_indexes,
+    add_user_indexes,
+    add_puzzle_bank,
+]
+
+def upgrade(engine):
+    """Bring an existing database up to date with the models in database.py."""
+    with engine.begin() as conn:
+        for step in STEPS:
+            step(conn)
+
+if __name__ == '__main__':
+    from backend import app
+    from database import db
+    with app.app_context():
+        db.create_all()
+        upgrade(db.engine)
+    print("Database schema is up to date")
@@ -0,0 +1,201 @@
+# puzzle_bank.py
+"""
+Shared bank of pre-generated puzzles, served by /puzzles/next.
+
+Puzzles are stored in the puzzle_bank table and handed out oldest first
+per difficulty, each one once. Served puzzles keep their row, so a puzzle
+id stays meaningful. A background thread tops a difficulty back up to
+SUDOKU_PUZZLE_BANK_SIZE unserved puzzles as soon as fewer than
+SUDOKU_PUZZLE_BANK_LOW remain, so requests rarely generate a puzzle
+themselves. Started with workers, the bank generates puzzles in that many
+processes, so generation does not hold the serving process's GIL.
+
+    SUDOKU_PUZZLE_BANK_LOW   unserved puzzles per difficulty that start a refill (default 20)
+    SUDOKU_PUZZLE_BANK_SIZE  unserved puzzles per difficulty after a refill (default 100)
+"""
+import functools
+import multiprocessing
+import os
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from sqlalchemy import func, select, update
+from database import db, Puzzle
+from db_config import env_int
+from puzzle_pool import DIFFICULTIES, Refiller
+from sudoku_logic import board_to_string, generate_puzzle
+
+LOW_WATERMARK = env_int('SUDOKU_PUZZLE_BANK_LOW', 20)
+HIGH_WATERMARK = env_int('SUDOKU_PUZZLE_BANK_SIZE', 100)
+# Puzzles generated per refill transaction
+BATCH_SIZE = 10
+# Added to the generator processes' niceness (Unix only)
+WORKER_NICENESS = 10
+# Tries at claiming a puzzle before generating one, when other requests claim the same rows
+CLAIM_ATTEMPTS = 3
+
+puzzles = Puzzle.__table__
+
+def next_unserved(difficulty):
+    """SELECT of the oldest unserved puzzle's (id, givens, solution); uses ix_puzzle_bank_unserved."""
+    return select(puzzles.c.id, puzzles.c.givens, puzzles.c.solution) \
+        .where(puzzles.c.difficulty == difficulty, puzzles.c.served_at == None) \
+        .order_by(puzzles.c.id).limit(1)
+
+def claim(puzzle_id):
+    """UPDATE marking a puzzle served; matches no row if another request claimed it first."""
+    return update(puzzles).where(puzzles.c.id == puzzle_id, puzzles.c.served_at == None) \
+        .values(served_at=datetime.utcnow())
+
+def new_puzzle(difficulty, generator=generate_puzzle, served=False):
+    """Generate a puzzle as a row for inserting into puzzle_bank."""
+    puzzle, solution = generator(difficulty)
+    return {"difficulty": difficulty, "givens": board_to_string(puzzle),
+            "solution": board_to_string(solution), "created_at": datetime.utcnow(),
+            "served_at": datetime.utcnow() if served else None}
+
+def _lower_priority():
+    """Worker initializer: let request handling win the CPU over refills."""
+    if hasattr(os, 'nice'):
+        os.nice(WORKER_NICENESS)
+
+class PuzzleBank(Refiller):
+    """
+    Tracks how many unserved puzzles each difficulty has left and refills
+    the table from a background thread, like PuzzlePool does in memory.
+    Until start() is called nothing is counted or refilled, and take()
+    generates a puzzle whenever the table has none.
+
+    Puzzles are generated by generate(): on the calling thread, or in a
+    pool of worker processes if start() was given workers.
+    """
+
+    thread_name = "puzzle-bank"
+
+    def __init__(self, low_watermark=LOW_WATERMARK, high_watermark=HIGH_WATERMARK,
+                 difficulties=DIFFICULTIES, generator=generate_puzzle):
+        super().__init__(low_watermark, high_watermark, difficulties)
+        self.generator = generator
+        self._unserved = None  # difficulty -> unserved puzzles, once started
+        self._app = None
+        self._workers = 0
+        self._executor = None
+
+    def start(self, app, workers=0):
+        """
+        Count the unserved puzzles and start the refill worker, using app's
+        database. With workers > 0, puzzles are generated in that many
+        processes instead of on the refill or request thread.
+        """
+        if self._thread is not None:
+            return
+        with app.app_context():
+            counts = dict(db.session.query(Puzzle.difficulty, func.count())
+                          .filter(Puzzle.served_at == None).group_by(Puzzle.difficulty).all())
+        with self._condition:
+            self._app = app
+            self._workers = workers
+            self._unserved = {difficulty: counts.get(difficulty, 0) for difficulty in self.difficulties}
+            self._refilling = {d for d, count in self._unserved.items() if count < self.low_watermark}
+        self._start_worker()
+
+    def stop(self, timeout=None):
+        """Stop the refill worker and the generator processes."""
+        with self._condition:
+            executor, self._executor = self._executor, None
+            self._workers = 0
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+        super().stop(timeout)
+
+    def generate(self, difficulty, served=False):
+        """
+        Generate a puzzle row (see new_puzzle) and return a
+        concurrent.futures.Future of it. Without worker processes the
+        puzzle is generated on this thread and the future is already done.
+        """
+        with self._condition:
+            if self._executor is None and self._workers:
+                self._executor = ProcessPoolExecutor(max_workers=self._workers,
+                                                     mp_context=multiprocessing.get_context('spawn'),
+                                                     initializer=_lower_priority)
+            executor = self._executor
+        if executor is None:
+            future = Future()
+            try:
+                future.set_result(new_puzzle(difficulty, self.generator, served))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+        try:
+            future = executor.submit(new_puzzle, difficulty, self.generator, served)
+        except BrokenProcessPool:
+            self._discard_executor(executor)
+            raise
+        future.add_done_callback(functools.partial(self._check_executor, executor))
+        return future
+
+    def _check_executor(self, executor, future):
+        if not future.cancelled() and isinstance(future.exception(), BrokenProcessPool):
+            self._discard_executor(executor)
+
+    def _discard_executor(self, executor):
+        """Drop a pool whose worker died, so generate() starts a new one."""
+        with self._condition:
+            if self._executor is not executor:
+                return
+            self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def take(self, difficulty):
+        """
+        Claim the oldest unserved puzzle of the difficulty and return
+        (id, givens, solution). If none is left, a puzzle is generated and
+        stored as served. Call within an app context.
+        """
+        for _ in range(CLAIM_ATTEMPTS):
+            row = db.session.execute(next_unserved(difficulty)).first()
+            if row is None:
+                break
+            claimed = db.session.execute(claim(row.id)).rowcount
+            db.session.commit()
+            if claimed:
+                self.served(difficulty)
+                return tuple(row)
+        row = self.generate(difficulty, served=True).result()
+        puzzle_id = db.session.execute(puzzles.insert().values(**row)).inserted_primary_key[0]
+        db.session.commit()
+        self.served(difficulty, from_bank=False)
+        return puzzle_id, row["givens"], row["solution"]
+
+    def served(self, difficulty, from_bank=True):
+        """Note a handed-out puzzle, and start a refill if the difficulty runs low."""
+        with self._condition:
+            if self._unserved is None:
+                return
+            if from_bank:
+                self._unserved[difficulty] = max(self._unserved[difficulty] - 1, 0)
+            self._taken(difficulty)
+
+    def unserved(self, difficulty):
+        """Unserved puzzles of the difficulty, or None before start()."""
+        with self._condition:
+            return None if self._unserved is None else self._unserved[difficulty]
+
+    def _stock(self, difficulty):
+        return self._unserved[difficulty]
+
+    def _refill(self, difficulty):
+        """Generate and store one batch of unserved puzzles."""
+        with self._condition:
+            count = min(BATCH_SIZE, self.high_watermark - self._unserved[difficulty])
+        futures = [self.generate(difficulty) for _ in range(max(count, 1))]
+        rows = [future.result() for future in futures]
+        with self._app.app_context():
+            db.session.execute(puzzles.insert(), rows)
+            db.session.commit()
+        with self._condition:
+            self._unserved[difficulty] += len(rows)
+
+# Shared by the backend routes
+puzzle_bank = PuzzleBank()
@@ -0,0 +1,143 @@
+# puzzle_pool.py
+import threading
+from collections import deque
+from sudoku_logic import generate_puzzle
+
+DIFFICULTIES = ('easy', 'medium', 'hard')
+
+class Refiller:
+    """
+    Background refill shared by PuzzlePool and puzzle_bank.PuzzleBank.
+
+    A worker thread tops a difficulty back up to high_watermark once its
+    stock drops below low_watermark, emptiest difficulty first. Subclasses
+    report the stock with _stock() and add to it with _refill(); the lock
+    is self._condition.
+    """
+
+    thread_name = "refill"
+
+    def __init__(self, low_watermark, high_watermark, difficulties):
+        if low_watermark < 0 or high_watermark < 1 or low_watermark > high_watermark:
+            raise ValueError("Watermarks must satisfy 0 <= low_watermark <= high_watermark, high_watermark >= 1")
+        self.low_watermark = low_watermark
+        self.high_watermark = high_watermark
+        self.difficulties = tuple(difficulties)
+        self._refilling = set()
+        self._condition = threading.Condition()
+        self._stopped = False
+        self._thread = None
+
+    def _start_worker(self):
+        if self._thread is not None:
+            return
+        with self._condition:
+            self._stopped = False
+        self._thread = threading.Thread(target=self._run, name=self.thread_name, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        """Stop the worker once its current refill step finishes."""
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _taken(self, difficulty):
+        """Start refilling the difficulty if it runs low. Caller holds the lock."""
+        if self._stock(difficulty) < self.low_watermark and difficulty not in self._refilling:
+            self._refilling.add(difficulty)
+            self._condition.notify()
+
+    def _stock(self, difficulty):
+        """Puzzles ready for the difficulty. Caller holds the lock."""
+        raise NotImplementedError
+
+    def _refill(self, difficulty):
+        """Add puzzles for the difficulty; called on the worker without the lock."""
+        raise NotImplementedError
+
+    def _next_difficulty(self):
+        """Pick the emptiest difficulty that needs refilling, or None. Caller holds the lock."""
+        pending = [d for d in self.difficulties if d in self._refilling]
+        if not pending:
+            return None
+        return min(pending, key=self._stock)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                difficulty = self._next_difficulty()
+                while difficulty is None and not self._stopped:
+                    self._condition.wait()
+                    difficulty = self._next_difficulty()
+                if self._stopped:
+                    return
+
+            try:
+                self._refill(difficulty)
+            except Exception as e:
+                print(f"Error refilling {difficulty} puzzles: {e}")
+                with self._condition:
+                    self._condition.wait(1.0)  # Back off before retrying
+                continue
+
+            with self._condition:
+                if self._stock(difficulty) >= self.high_watermark:
+                    self._refilling.discard(difficulty)
+
+class PuzzlePool(Refiller):
+    """
+    Keeps ready-made puzzles for each difficulty so a new game does not
+    have to wait for the generator.
+
+    A background thread refills a difficulty once it drops below
+    low_watermark and keeps generating until it holds high_watermark
+    puzzles. pop() never blocks on the worker: if the pool for a difficulty
+    is empty it calls fallback(difficulty) on the calling thread instead
+    (generator if no fallback is given). A generator that may be slow, such
+    as one fetching puzzles over the network, should come with a fallback
+    that is quick.
+
+    Entries are whatever generator(difficulty) returns; by default the
+    (puzzle, solution) pairs of sudoku_logic.generate_puzzle().
+    """
+
+    thread_name = "puzzle-pool"
+
+    def __init__(self, low_watermark=2, high_watermark=5, difficulties=DIFFICULTIES,
+                 generator=generate_puzzle, fallback=None):
+        super().__init__(low_watermark, high_watermark, difficulties)
+        self.generator = generator
+        self.fallback = fallback or generator
+        self._pools = {difficulty: deque() for difficulty in self.difficulties}
+        self._refilling = set(self.difficulties)  # Start by filling every pool
+
+    def start(self):
+        """Start the background refill worker."""
+        self._start_worker()
+
+    def pop(self, difficulty):
+        """Return a puzzle for the difficulty, from fallback on this thread if the pool is empty."""
+        with self._condition:
+            pool = self._pools[difficulty]
+            puzzle = pool.popleft() if pool else None
+            self._taken(difficulty)
+        if puzzle is None:
+            puzzle = self.fallback(difficulty)
+        return puzzle
+
+    def size(self, difficulty):
+        """Number of puzzles currently ready for the difficulty."""
+        with self._condition:
+            return len(self._pools[difficulty])
+
+    def _stock(self, difficulty):
+        return len(self._pools[difficulty])
+
+    def _refill(self, difficulty):
+        puzzle = self.generator(difficulty)
+        with self._condition:
+            self._pools[difficulty].append(puzzle)
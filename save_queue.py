@@ -0,0 +1,146 @@
+# save_queue.py
+import threading
+import time
+from collections import deque
+
+class SaveRejected(Exception):
+    """Raised by a send function for a save the server refused; it is not retried."""
+
+class SaveWorker:
+    """
+    Sends saves from a background thread so the UI never waits on the network.
+
+    submit() queues a payload. Payloads are sent one at a time, in order, by
+    send(payload), which returns a result or raises. If the newest queued
+    payload (not yet being sent) has the same key as a new one, the two are
+    combined with merge(old, new), so a burst of saves collapses into a
+    single request carrying the latest state. Payloads submitted with
+    key=None are never combined.
+
+    A failed send is retried up to retries times, waiting backoff seconds
+    and doubling up to max_backoff between attempts; SaveRejected is not
+    retried. If a payload with the same key is queued while a failed one
+    waits to be retried, the failed payload is merged into it instead.
+
+    Finished payloads are reported by poll(), which calls
+    on_result(payload, result, error) for each of them on the calling
+    thread; a Tk app calls it periodically with root.after(), since Tk must
+    only be used from its own thread.
+    """
+
+    def __init__(self, send, on_result=None, merge=None,
+                 retries=3, backoff=0.5, max_backoff=8.0):
+        self.send = send
+        self.on_result = on_result
+        self.merge = merge or (lambda old, new: new)
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self._queue = deque()  # (key, payload)
+        self._busy = False     # A payload is being sent or waiting to be retried
+        self._results = deque()  # (payload, result, error) awaiting poll()
+        self._condition = threading.Condition()
+        self._stopped = False
+        self._thread = None
+
+    def start(self):
+        """Start the background sender."""
+        if self._thread is not None:
+            return
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name="save-worker", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        """
+        Send everything still queued, waiting at most timeout seconds, then
+        stop. Returns True if the queue was fully flushed.
+        """
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            flushed = not self._thread.is_alive()
+            self._thread = None
+            return flushed
+        return not self._queue
+
+    def submit(self, payload, key=None):
+        """Queue a payload, combining it with the newest queued one if the keys match."""
+        with self._condition:
+            if key is not None and self._queue and self._queue[-1][0] == key:
+                payload = self.merge(self._queue[-1][1], payload)
+                self._queue[-1] = (key, payload)
+            else:
+                self._queue.append((key, payload))
+            self._condition.notify_all()
+
+    def flush(self, timeout=None):
+        """Wait until every queued payload is done. Returns False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while self._queue or self._busy:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+            return True
+
+    def poll(self):
+        """Run on_result for every payload finished since the last call. Returns how many."""
+        count = 0
+        while True:
+            try:
+                payload, result, error = self._results.popleft()
+            except IndexError:
+                return count
+            if self.on_result is not None:
+                self.on_result(payload, result, error)
+            count += 1
+
+    def pending(self):
+        """Number of payloads queued or in flight."""
+        with self._condition:
+            return len(self._queue) + self._busy
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._queue and not self._stopped:
+                    self._condition.wait()
+                if not self._queue:
+                    return  # Stopped and drained
+                key, payload = self._queue.popleft()
+                self._busy = True
+
+            try:
+                done = self._send_with_retries(key, payload)
+                if done is not None:
+                    self._results.append((payload,) + done)
+            finally:
+                with self._condition:
+                    self._busy = False
+                    self._condition.notify_all()
+
+    def _send_with_retries(self, key, payload):
+        """Returns (result, error), or None if a newer payload took this one over."""
+        attempt = 0
+        while True:
+            try:
+                return self.send(payload), None
+            except SaveRejected as e:
+                return None, e
+            except Exception as e:
+                attempt += 1
+                if attempt > self.retries:
+                    return None, e
+            delay = min(self.backoff * 2 ** (attempt - 1), self.max_backoff)
+            with self._condition:
+                self._condition.wait_for(
+                    lambda: key is not None and self._queue and self._queue[0][0] == key, delay)
+                if key is not None and self._queue and self._queue[0][0] == key:
+                    # A newer save for the same state is queued; send the combination instead
+                    newer_key, newer = self._queue[0]
+                    self._queue[0] = (newer_key, self.merge(payload, newer))
+                    return None
@@ -0,0 +1,98 @@
+# serve.py
+"""
+Production serving mode: runs backend.app under the waitress WSGI server.
+
+    python serve.py --host 127.0.0.1 --port 5000 --threads 8
+
+Requests are handled by a pool of worker threads in a single process. The
+leaderboard and the response cache live in process memory, so the backend
+must not be run as several processes against one database. SIGINT and
+SIGTERM shut down gracefully: the listening socket is closed, requests in
+progress are given shutdown_timeout seconds to finish, then the server
+exits.
+"""
+import argparse
+import os
+import signal
+import threading
+import time
+from backend import app, prepare_database
+
+try:
+    from waitress import create_server
+    from waitress import wasyncore
+except ImportError:  # waitress is only needed for this serving mode
+    create_server = None
+
+DEFAULT_THREADS = 8
+DEFAULT_CONNECTION_LIMIT = 100
+SHUTDOWN_TIMEOUT = 10
+
+_server = None
+_server_lock = threading.Lock()
+
+def serve(host='127.0.0.1', port=5000, threads=DEFAULT_THREADS,
+          connection_limit=DEFAULT_CONNECTION_LIMIT, shutdown_timeout=SHUTDOWN_TIMEOUT):
+    """
+    Serve the backend until shutdown() is called or, when run on the main
+    thread, until SIGINT or SIGTERM.
+    """
+    global _server
+    if create_server is None:
+        raise RuntimeError("waitress is not installed (pip install waitress)")
+    prepare_database()
+    server = create_server(app, host=host, port=port, threads=threads,
+                           connection_limit=connection_limit, ident="sudoku")
+    with _server_lock:
+        _server = server
+
+    if threading.current_thread() is threading.main_thread():
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *args: threading.Thread(
+                target=shutdown, args=(shutdown_timeout,), daemon=True).start())
+
+    print(f"Serving on http://{host}:{port} with {threads} threads")
+    try:
+        server.run()
+    finally:
+        server.task_dispatcher.shutdown(timeout=shutdown_timeout)
+        with _server_lock:
+            if _server is server:
+                _server = None
+
+def shutdown(timeout=SHUTDOWN_TIMEOUT):
+    """
+    Gracefully stop the server started by serve(), from any thread: stop
+    accepting connections, wait up to timeout seconds for queued and
+    running requests, then close the remaining connections.
+    """
+    with _server_lock:
+        server = _server
+    if server is None:
+        return
+    # Socket operations must run on the server's own loop thread
+    server.trigger.pull_trigger(lambda: wasyncore.dispatcher.close(server))
+    dispatcher = server.task_dispatcher
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with dispatcher.lock:
+            if not dispatcher.queue and dispatcher.active_count == 0:
+                break
+        time.sleep(0.05)
+    server.trigger.pull_trigger(lambda: wasyncore.close_all(server._map))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the Sudoku backend with waitress")
+    parser.add_argument("--host", default=os.environ.get("SUDOKU_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("SUDOKU_PORT", 5000)))
+    parser.add_argument("--threads", type=int, default=int(os.environ.get("SUDOKU_THREADS", DEFAULT_THREADS)),
+                        help="worker threads handling requests")
+    parser.add_argument("--connection-limit", type=int, default=DEFAULT_CONNECTION_LIMIT,
+                        help="open connections accepted before new ones wait")
+    parser.add_argument("--shutdown-timeout", type=float, default=SHUTDOWN_TIMEOUT,
+                        help="seconds to let requests in progress finish on shutdown")
+    args = parser.parse_args(argv)
+    serve(args.host, args.port, args.threads, args.connection_limit, args.shutdown_timeout)
+
+if __name__ == "__main__":
+    main()
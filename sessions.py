@@ -0,0 +1,85 @@
+# sessions.py
+"""
+Signed session tokens and a short-lived cache of the users they stand for.
+
+/login issues a token that carries the user id, signed with the app's
+secret key, so later requests are authenticated without a database
+lookup. The user rows those requests need (existence, statistics) are
+served from UserCache and re-read from the database once their entry is
+older than its TTL.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from flask import current_app
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+from database import User
+
+# Seconds a token stays valid after /login
+TOKEN_MAX_AGE = int(os.environ.get('SUDOKU_TOKEN_MAX_AGE') or 7 * 24 * 3600)
+
+CachedUser = namedtuple('CachedUser', 'id username puzzles_played puzzles_solved win_percentage')
+
+def _serializer(secret_key=None):
+    return URLSafeTimedSerializer(secret_key or current_app.secret_key, salt='sudoku-session')
+
+def issue_token(user_id, secret_key=None):
+    """
+    Signed token identifying user_id, for the Authorization: Bearer header.
+    Signed with the Flask app's secret key unless secret_key is given.
+    """
+    return _serializer(secret_key).dumps(user_id)
+
+def token_user_id(token, secret_key=None):
+    """The user id in a token, or None if it is forged, malformed or expired."""
+    try:
+        user_id = _serializer(secret_key).loads(token, max_age=TOKEN_MAX_AGE)
+    except BadSignature:  # Includes SignatureExpired
+        return None
+    return user_id if type(user_id) is int else None
+
+class UserCache:
+    """
+    Users by id, each kept for ttl seconds; least recently used entries are
+    dropped beyond max_entries. Unknown ids are not cached.
+    """
+
+    def __init__(self, ttl=30.0, max_entries=10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # user_id -> (expires_at, CachedUser)
+        self._lock = threading.Lock()
+
+    def cached(self, user_id):
+        """The user as a CachedUser if a fresh entry is held, else None."""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(user_id)
+                return entry[1]
+        return None
+
+    def get(self, user_id):
+        """The user as a CachedUser, or None if there is no such user."""
+        cached = self.cached(user_id)
+        if cached is not None:
+            return cached
+        row = User.query.with_entities(
+            User.id, User.username, User.puzzles_played, User.puzzles_solved, User.win_percentage
+        ).filter(User.id == user_id).first()
+        return self.put(row) if row is not None else None
+
+    def put(self, user):
+        """Store a user (ORM object or row with the same columns) after it was read or committed."""
+        cached = CachedUser(user.id, user.username, user.puzzles_played or 0,
+                            user.puzzles_solved or 0, user.win_percentage or 0.0)
+        with self._lock:
+            self._entries[user.id] = (time.monotonic() + self.ttl, cached)
+            self._entries.move_to_end(user.id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return cached
+
+# Shared by the backend routes
+user_cache = UserCache()
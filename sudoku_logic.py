@@ -1,13 +1,122 @@
 # sudoku_logic.py
+import base64
+import binascii
 import json
+import threading
+from collections import OrderedDict
 from random import randint, shuffle
-import copy
+import dlx
+
+# Uniqueness oracles usable by count_solutions(), is_fully_solvable() and
+# generate_board(). 'backtrack' is the original naive counter.
+ORACLES = ('dlx', 'backtrack')
+DEFAULT_ORACLE = 'dlx'
+
+# Maximum number of puzzles whose solutions are kept by get_solution()
+SOLUTION_CACHE_SIZE = 256
+
+_DIGIT_TO_CHAR = bytes.maketrans(bytes(range(10)), b"0123456789")
+_CHAR_TO_DIGIT = bytes.maketrans(b"0123456789", bytes(range(10)))
+
+class Board:
+    """
+    A Sudoku board stored as a flat bytearray of 81 cells, row by row.
+
+    board[r][c] and board[r, c] both work, so a Board can be passed anywhere
+    the list-of-lists format is accepted. board[r] is a writable view of
+    row r rather than a copy; iterating over a Board yields row lists.
+    """
+    __slots__ = ('cells',)
+
+    def __init__(self, cells=None):
+        if cells is None:
+            self.cells = bytearray(81)
+            return
+        cells = bytearray(cells)
+        if len(cells) != 81 or max(cells) > 9:
+            raise ValueError("Board needs 81 cells with values 0-9")
+        self.cells = cells
+
+    @classmethod
+    def from_list(cls, board):
+        """Build a Board from the list-of-lists format."""
+        if len(board) != 9 or any(len(row) != 9 for row in board):
+            raise ValueError("Board must be 9x9")
+        return cls(cell for row in board for cell in row)
+
+    @classmethod
+    def from_string(cls, board_str):
+        """Build a Board from the compact 81-character format."""
+        if not is_compact_board(board_str):
+            raise ValueError("Compact board must be 81 digits")
+        board = cls.__new__(cls)
+        board.cells = bytearray(board_str.encode("ascii").translate(_CHAR_TO_DIGIT))
+        return board
+
+    def to_list(self):
+        """Convert to the list-of-lists format."""
+        cells = self.cells
+        return [list(cells[i:i + 9]) for i in range(0, 81, 9)]
+
+    def to_string(self):
+        """Convert to the compact 81-character format."""
+        return self.cells.translate(_DIGIT_TO_CHAR).decode("ascii")
+
+    def copy(self):
+        board = Board.__new__(Board)
+        board.cells = self.cells[:]
+        return board
+
+    def row(self, r):
+        """Writable view of row r."""
+        return memoryview(self.cells)[r * 9:r * 9 + 9]
+
+    def col(self, c):
+        """Writable view of column c."""
+        return memoryview(self.cells)[c::9]
+
+    def box(self, b):
+        """Values of box b (0-8, left to right, top to bottom) as a list."""
+        start = (b // 3) * 27 + (b % 3) * 3
+        cells = self.cells
+        return list(cells[start:start + 3]) + list(cells[start + 9:start + 12]) + list(cells[start + 18:start + 21])
+
+    def __getitem__(self, key):
+        if isinstance(key, tuple):
+            r, c = key
+            return self.cells[r * 9 + c]
+        return self.row(key)
+
+    def __setitem__(self, key, value):
+        r, c = key
+        self.cells[r * 9 + c] = value
+
+    def __iter__(self):
+        cells = self.cells
+        for i in range(0, 81, 9):
+            yield list(cells[i:i + 9])
+
+    def __len__(self):
+        return 9
+
+    def __eq__(self, other):
+        if isinstance(other, Board):
+            return self.cells == other.cells
+        if isinstance(other, list):
+            return self.to_list() == other
+        return NotImplemented
+
+    def __repr__(self):
+        return f"Board({self.to_string()!r})"
 
 def print_board(board):
     for row in board:
         print(" ".join(str(cell) if cell != 0 else "." for cell in row))
 
 def find_empty(board):
+    if isinstance(board, Board):
+        index = board.cells.find(0)
+        return None if index < 0 else divmod(index, 9)
     for i in range(9):
         for j in range(9):
             if board[i][j] == 0:
@@ -15,6 +124,13 @@ def find_empty(board):
     return None
 
 def valid(board, pos, num):
+    if isinstance(board, Board):
+        cells = board.cells
+        for peer in _PEERS[pos[0] * 9 + pos[1]]:
+            if cells[peer] == num:
+                return False
+        return True
+
     # Check row
     for j in range(9):
         if board[pos[0]][j] == num and j != pos[1]:
@@ -35,32 +151,191 @@ def valid(board, pos, num):
                 
     return True
 
-def solve(board):
+# Bitmask solver tables. Cells are addressed by flat index r * 9 + c and
+# digit d is represented by bit (1 << d), so a full row/column/box mask is
+# 0b1111111110.
+_ALL_DIGITS = 0x3FE
+_ROW_OF = [i // 9 for i in range(81)]
+_COL_OF = [i % 9 for i in range(81)]
+_BOX_OF = [(i // 27) * 3 + (i % 9) // 3 for i in range(81)]
+_POPCOUNT = [bin(mask).count("1") for mask in range(1024)]
+_MASK_DIGITS = [[d for d in range(1, 10) if mask >> d & 1] for mask in range(1024)]
+_PEERS = [
+    [j for j in range(81) if j != i and (
+        _ROW_OF[j] == _ROW_OF[i] or _COL_OF[j] == _COL_OF[i] or _BOX_OF[j] == _BOX_OF[i])]
+    for i in range(81)
+]
+
+def _cells(board):
+    """Return the board's cells as a flat sequence. A Board's own bytearray is returned, not a copy."""
+    if isinstance(board, Board):
+        return board.cells
+    return [cell for row in board for cell in row]
+
+def _write_back(board, cells):
+    """Copy flat cells into a list-of-lists board; a Board already holds them."""
+    if not isinstance(board, Board):
+        for r in range(9):
+            board[r][:] = cells[r * 9:r * 9 + 9]
+
+def _copy_board(board):
+    """Copy a Board or a list-of-lists board without deepcopy."""
+    if isinstance(board, Board):
+        return board.copy()
+    return [list(row) for row in board]
+
+def _init_masks(cells):
     """
-    Solve the Sudoku board using backtracking.
-    Returns True if a solution is found, False otherwise.
+    Build the used-digit bitmasks for every row, column and box from flat cells.
+    Returns (rows, cols, boxes, empties), or None if the givens conflict.
+    """
+    rows = [0] * 9
+    cols = [0] * 9
+    boxes = [0] * 9
+    empties = []
+    for i in range(81):
+        val = cells[i]
+        if val == 0:
+            empties.append(i)
+            continue
+        bit = 1 << val
+        r, c, b = _ROW_OF[i], _COL_OF[i], _BOX_OF[i]
+        if (rows[r] | cols[c] | boxes[b]) & bit:
+            return None  # Duplicate given
+        rows[r] |= bit
+        cols[c] |= bit
+        boxes[b] |= bit
+    return rows, cols, boxes, empties
+
+def _pick_cell(rows, cols, boxes, empties):
+    """
+    Return (index into empties, candidate mask) of the most constrained
+    empty cell (MRV). Stops early on a dead end or a forced cell.
+    """
+    best_index = -1
+    best_mask = 0
+    best_count = 10
+    for index, i in enumerate(empties):
+        mask = _ALL_DIGITS & ~(rows[_ROW_OF[i]] | cols[_COL_OF[i]] | boxes[_BOX_OF[i]])
+        count = _POPCOUNT[mask]
+        if count < best_count:
+            best_index, best_mask, best_count = index, mask, count
+            if count <= 1:
+                break
+    return best_index, best_mask
+
+def _take(empties, index):
+    """Swap-remove empties[index] in O(1) and return it."""
+    cell = empties[index]
+    empties[index] = empties[-1]
+    empties.pop()
+    return cell
+
+def _put_back(empties, index, cell):
+    """Undo _take(empties, index)."""
+    if index == len(empties):
+        empties.append(cell)
+    else:
+        empties.append(empties[index])
+        empties[index] = cell
+
+def _search(cells, rows, cols, boxes, empties, randomize=True):
+    """
+    Depth-first search over the bitmask state, always branching on the
+    most constrained cell. Masks and the empties list are updated in place
+    and undone on backtrack, so nothing is copied. On success the flat
+    cells are left filled in and True is returned.
     """
-    empty = find_empty(board)
-    if not empty:
+    if not empties:
         return True
-    row, col = empty
-    
-    # Try numbers 1-9 in a random order to add variety
-    nums = list(range(1, 10))
-    shuffle(nums)
-    
-    for num in nums:
-        if valid(board, (row, col), num):
-            board[row][col] = num
-            if solve(board):
-                return True
-            board[row][col] = 0  # Backtrack if no solution
+    index, mask = _pick_cell(rows, cols, boxes, empties)
+    if mask == 0:
+        return False
+
+    # Remove the chosen cell; restored below if every digit fails
+    i = _take(empties, index)
+    r, c, b = _ROW_OF[i], _COL_OF[i], _BOX_OF[i]
+
+    digits = _MASK_DIGITS[mask]
+    if randomize:
+        # Try numbers in a random order to add variety
+        digits = digits[:]
+        shuffle(digits)
+
+    for num in digits:
+        bit = 1 << num
+        cells[i] = num
+        rows[r] |= bit
+        cols[c] |= bit
+        boxes[b] |= bit
+        if _search(cells, rows, cols, boxes, empties, randomize):
+            return True
+        rows[r] ^= bit
+        cols[c] ^= bit
+        boxes[b] ^= bit
+    cells[i] = 0  # Backtrack if no solution
+
+    _put_back(empties, index, i)
     return False
 
-def count_solutions(board, limit=2):
-    """Count the number of solutions a board has, up to the limit"""
-    # Create a deep copy of the board to prevent modifications to the original
-    board_copy = copy.deepcopy(board)
+def _count(rows, cols, boxes, empties, limit):
+    """
+    Count completions of the bitmask state, up to the limit.
+    Works on the masks alone and leaves them exactly as it found them.
+    """
+    if not empties:
+        return 1
+    index, mask = _pick_cell(rows, cols, boxes, empties)
+    if mask == 0:
+        return 0
+
+    i = _take(empties, index)
+    r, c, b = _ROW_OF[i], _COL_OF[i], _BOX_OF[i]
+    found = 0
+    for num in _MASK_DIGITS[mask]:
+        bit = 1 << num
+        rows[r] |= bit
+        cols[c] |= bit
+        boxes[b] |= bit
+        found += _count(rows, cols, boxes, empties, limit - found)
+        rows[r] ^= bit
+        cols[c] ^= bit
+        boxes[b] ^= bit
+        if found >= limit:
+            break
+
+    _put_back(empties, index, i)
+    return found
+
+def solve(board):
+    """
+    Solve the Sudoku board in place using bitmask constraint propagation.
+    Accepts a Board or a list of lists.
+    Returns True if a solution is found, False otherwise.
+    """
+    cells = _cells(board)
+    state = _init_masks(cells)
+    if state is None:
+        return False
+    rows, cols, boxes, empties = state
+    if not _search(cells, rows, cols, boxes, empties):
+        return False
+    _write_back(board, cells)
+    return True
+
+def count_solutions(board, limit=2, oracle=None):
+    """
+    Count the number of solutions a board has, up to the limit.
+    oracle selects the engine: 'dlx' (Dancing Links) or 'backtrack'.
+    """
+    oracle = oracle or DEFAULT_ORACLE
+    if oracle == 'dlx':
+        return dlx.count_solutions(board, limit)
+    if oracle != 'backtrack':
+        raise ValueError(f"Unknown oracle: {oracle}")
+
+    # Copy the board to prevent modifications to the original
+    board_copy = _copy_board(board)
     solutions = [0]
     
     def backtrack():
@@ -84,24 +359,89 @@ def count_solutions(board, limit=2):
     backtrack()
     return solutions[0]
 
-def is_fully_solvable(board):
+def is_fully_solvable(board, oracle=None):
     """Check if the board has exactly one solution"""
-    # Make a deep copy as solve() modifies the input board
-    board_copy = copy.deepcopy(board)
+    # Copy the board as solve() modifies the input board
+    board_copy = _copy_board(board)
     
     # Check if the board can be solved
     if not solve(board_copy):
         return False
     
     # Check that the board has exactly one solution
-    return count_solutions(board) == 1
+    return count_solutions(board, oracle=oracle) == 1
+
+def _carve_incremental(board, order, cells_to_remove):
+    """
+    Remove up to cells_to_remove givens from a solved board, trying the
+    (row, col) positions in order, while keeping the solution unique.
+    The bitmask state is carried over from one removal to the next. Since
+    the current puzzle's solution is known, a removal only breaks
+    uniqueness if some other digit at that cell also leads to a solution,
+    so only that search is run.
+    """
+    cells = _cells(board)
+    rows, cols, boxes, empties = _init_masks(cells)
+    removed = 0
+    for r, c in order:
+        if removed >= cells_to_remove:
+            break
+
+        i = r * 9 + c
+        b = _BOX_OF[i]
+        bit = 1 << cells[i]
+        rows[r] ^= bit
+        cols[c] ^= bit
+        boxes[b] ^= bit
 
-def generate_board(difficulty='medium'):
+        # Try every other digit that fits at (r, c)
+        alternatives = _ALL_DIGITS & ~(rows[r] | cols[c] | boxes[b] | bit)
+        unique = True
+        for num in _MASK_DIGITS[alternatives]:
+            alt = 1 << num
+            rows[r] |= alt
+            cols[c] |= alt
+            boxes[b] |= alt
+            found = _count(rows, cols, boxes, empties, 1)
+            rows[r] ^= alt
+            cols[c] ^= alt
+            boxes[b] ^= alt
+            if found:
+                unique = False
+                break
+
+        if unique:
+            cells[i] = 0
+            empties.append(i)
+            removed += 1
+        else:
+            # Restore the cell
+            rows[r] |= bit
+            cols[c] |= bit
+            boxes[b] |= bit
+    _write_back(board, cells)
+
+def generate_board(difficulty='medium', oracle=None, carving='incremental'):
     """
     Generate a Sudoku board with the specified difficulty.
+    Returns a board with exactly one solution; see generate_puzzle() for
+    the arguments and for getting the solution as well.
+    """
+    return generate_puzzle(difficulty, oracle, carving)[0]
+
+def generate_puzzle(difficulty='medium', oracle=None, carving='incremental'):
+    """
+    Generate a Sudoku puzzle with the specified difficulty.
     Difficulty levels: 'easy', 'medium', 'hard'
-    Returns a board with exactly one solution.
+    carving selects how removals are checked for uniqueness: 'incremental'
+    reuses solver state between removals, 'recount' re-counts solutions
+    from scratch after each one using the given oracle (see count_solutions).
+    Returns (puzzle, solution): a board with exactly one solution and that
+    solution, both as lists of lists.
     """
+    if carving not in ('incremental', 'recount'):
+        raise ValueError(f"Unknown carving mode: {carving}")
+
     # Start with an empty board
     board = [[0 for _ in range(9)] for _ in range(9)]
     
@@ -116,7 +456,7 @@ def generate_board(difficulty='medium'):
     # Solve the rest of the board
     if not solve(board):
         # This shouldn't happen, but if it does, try again with a different starting board
-        return generate_board(difficulty)
+        return generate_puzzle(difficulty, oracle, carving)
     
     # Create a copy of the solved board
     solution = [row[:] for row in board]
@@ -138,68 +478,154 @@ def generate_board(difficulty='medium'):
     shuffle(all_cells)
     
     # Remove cells one by one, ensuring we maintain a unique solution
-    removed = 0
-    for i, j in all_cells:
-        # Skip if we've already removed enough cells
-        if removed >= cells_to_remove:
-            break
-            
-        # Remember the value before removing
-        temp = board[i][j]
-        board[i][j] = 0
-        
-        # Check if board still has exactly one solution
-        if count_solutions(board) != 1:
-            # If not, restore the cell
-            board[i][j] = temp
-        else:
-            removed += 1
-    
-    # Final validation - ensure no duplicate numbers in rows, columns or boxes
-    for i in range(9):
-        # Check rows
-        row_vals = [board[i][j] for j in range(9) if board[i][j] != 0]
-        if len(row_vals) != len(set(row_vals)):
-            # Found duplicates, regenerate
-            return generate_board(difficulty)
+    if carving == 'incremental':
+        _carve_incremental(board, all_cells, cells_to_remove)
+    else:
+        removed = 0
+        for i, j in all_cells:
+            # Skip if we've already removed enough cells
+            if removed >= cells_to_remove:
+                break
+                
+            # Remember the value before removing
+            temp = board[i][j]
+            board[i][j] = 0
             
-        # Check columns
-        col_vals = [board[j][i] for j in range(9) if board[j][i] != 0]
-        if len(col_vals) != len(set(col_vals)):
-            # Found duplicates, regenerate
-            return generate_board(difficulty)
+            # Check if board still has exactly one solution
+            if count_solutions(board, oracle=oracle) != 1:
+                # If not, restore the cell
+                board[i][j] = temp
+            else:
+                removed += 1
     
-    # Check 3x3 boxes
-    for box_i in range(3):
-        for box_j in range(3):
-            box_vals = []
-            for i in range(3):
-                for j in range(3):
-                    val = board[box_i*3 + i][box_j*3 + j]
-                    if val != 0:
-                        box_vals.append(val)
-            if len(box_vals) != len(set(box_vals)):
-                # Found duplicates, regenerate
-                return generate_board(difficulty)
-    
-    # Make sure the board is solvable
-    test_board = copy.deepcopy(board)
-    if not solve(test_board):
-        # This shouldn't happen given our checks, but just in case
-        return generate_board(difficulty)
-        
-    return board
+    # Carving only empties cells of a valid solution, so the puzzle has no
+    # duplicates and that solution is its only one
+    # Remember the solution so hints and solving are lookups later
+    cache_solution(board, solution)
+    return board, solution
+
+_DIGIT_CHARS = frozenset("0123456789")
+
+def board_to_compact(board):
+    """Convert board to an 81-character digit string, row by row, 0 for empty cells."""
+    if isinstance(board, Board):
+        return board.to_string()
+    return "".join(str(cell) for row in board for cell in row)
+
+def compact_to_board(board_str):
+    """Convert an 81-character digit string back to board."""
+    if len(board_str) != 81 or not _DIGIT_CHARS.issuperset(board_str):
+        raise ValueError("Compact board must be 81 digits")
+    return [[ord(ch) - 48 for ch in board_str[i:i + 9]] for i in range(0, 81, 9)]
+
+def is_compact_board(board_str):
+    """Check that a string is a well-formed compact board, without decoding it."""
+    return len(board_str) == 81 and _DIGIT_CHARS.issuperset(board_str)
+
+def pack_board(board):
+    """Pack board into 41 bytes, two cells per byte (high nibble first)."""
+    cells = [cell for row in board for cell in row] + [0]
+    return bytes((cells[i] << 4) | cells[i + 1] for i in range(0, 82, 2))
+
+def unpack_board(data):
+    """Convert 41 packed bytes back to board."""
+    if len(data) != 41:
+        raise ValueError("Packed board must be 41 bytes")
+    cells = []
+    for byte in data:
+        cells.append(byte >> 4)
+        cells.append(byte & 0x0F)
+    if max(cells) > 9:
+        raise ValueError("Packed board contains an invalid cell value")
+    return [cells[i:i + 9] for i in range(0, 81, 9)]
+
+# Length of a packed board as base64 text
+PACKED_TEXT_LENGTH = 56
+
+def board_to_packed(board):
+    """Convert board to its 41 packed bytes as base64 text, for JSON bodies."""
+    return base64.b64encode(pack_board(board)).decode('ascii')
+
+def packed_to_board(text):
+    """Convert base64 packed text (see board_to_packed) back to board."""
+    try:
+        data = base64.b64decode(text, validate=True)
+    except (binascii.Error, ValueError):
+        raise ValueError("Packed board must be base64")
+    return unpack_board(data)
+
+def to_compact(board_str):
+    """
+    Return a storage string in compact form. Compact input is only checked,
+    not decoded; legacy JSON input is converted.
+    """
+    if is_compact_board(board_str):
+        return board_str
+    return board_to_compact(string_to_board(board_str))
 
 def board_to_string(board):
-    """Convert board to JSON string."""
-    return json.dumps(board)
+    """Convert board to its storage string (compact 81-character form)."""
+    return board_to_compact(board)
 
 def string_to_board(board_str):
-    """Convert JSON string back to board."""
-    return json.loads(board_str)
+    """
+    Convert a storage string back to board.
+    Accepts the compact form and, for older saves, a JSON nested list.
+    Raises ValueError if the string is neither.
+    """
+    if board_str.startswith("["):
+        board = json.loads(board_str)  # Legacy JSON format
+        if len(board) != 9 or any(len(row) != 9 for row in board):
+            raise ValueError("JSON board must be 9x9")
+        return board
+    return compact_to_board(board_str)
+
+_solution_cache = OrderedDict()
+_solution_cache_lock = threading.Lock()
+
+def cache_solution(puzzle, solution):
+    """
+    Remember the solution of a puzzle. Entries are keyed by the puzzle's
+    compact givens string and evicted least recently used first once
+    SOLUTION_CACHE_SIZE is exceeded.
+    """
+    key = board_to_compact(puzzle)
+    value = board_to_compact(solution)
+    with _solution_cache_lock:
+        _solution_cache[key] = value
+        _solution_cache.move_to_end(key)
+        while len(_solution_cache) > SOLUTION_CACHE_SIZE:
+            _solution_cache.popitem(last=False)
+
+def get_solution(puzzle):
+    """
+    Return the solution of a puzzle as a new board (list of lists), or None
+    if it has no solution. Cached solutions are returned without solving;
+    on a miss the puzzle is solved and the result cached.
+    """
+    key = board_to_compact(puzzle)
+    with _solution_cache_lock:
+        value = _solution_cache.get(key)
+        if value is not None:
+            _solution_cache.move_to_end(key)
+    if value is None:
+        board = Board.from_string(key)
+        if not solve(board):
+            return None
+        value = board.to_string()
+        cache_solution(puzzle, board)
+    return compact_to_board(value)
+
+def clear_solution_cache():
+    """Forget every cached solution."""
+    with _solution_cache_lock:
+        _solution_cache.clear()
 
 def is_valid_board(board):
     """Check if a board is valid (follows Sudoku rules)"""
+    if isinstance(board, Board):
+        return _init_masks(board.cells) is not None
+
     # Check each row
     for row in range(9):
         nums = {}